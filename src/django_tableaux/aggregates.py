@@ -0,0 +1,73 @@
+"""
+Footer row of aggregates declared on the table, e.g.
+
+    class Meta:
+        footer = {"amount": "sum", "price": "avg", "id": "count"}
+
+The aggregates cover all the filtered data, not just the rows on the page.
+"""
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Avg, Count, Max, Min, QuerySet, Sum
+from django.utils.formats import localize, number_format
+from django_tables2.utils import A, call_with_appropriate
+
+AGGREGATES = {"sum": Sum, "avg": Avg, "min": Min, "max": Max, "count": Count}
+
+
+def footer_functions(table) -> dict:
+    """
+    Return {column name: function name} from Meta.footer
+    """
+    footer = getattr(table.Meta, "footer", {}) if getattr(table, "Meta", None) else {}
+    if not isinstance(footer, dict):
+        raise ImproperlyConfigured("Meta.footer must be a dictionary")
+    for name, function in footer.items():
+        if function not in AGGREGATES:
+            raise ImproperlyConfigured(f"Meta.footer['{name}'] must be one of {', '.join(AGGREGATES)}")
+        if name not in table.columns.columns:
+            raise ImproperlyConfigured(f"Meta.footer names '{name}' which is not a column")
+    return footer
+
+
+def column_path(table, name) -> str:
+    """
+    The ORM path of a column's accessor
+    """
+    return str(table.columns[name].accessor).replace(".", "__")
+
+
+def compute_aggregates(data, table, functions) -> dict:
+    """
+    Return {column name: value}; a queryset is aggregated by the database in one query
+    """
+    paths = {name: column_path(table, name) for name in functions}
+    if isinstance(data, QuerySet):
+        return data.aggregate(**{name: AGGREGATES[function](paths[name]) for name, function in functions.items()})
+    result = {}
+    for name, function in functions.items():
+        values = [value for value in (A(paths[name]).resolve(record, quiet=True) for record in data) if value is not None]
+        if function == "count":
+            result[name] = len(values)
+        elif not values:
+            result[name] = None
+        elif function == "avg":
+            result[name] = sum(values) / len(values)
+        else:
+            result[name] = {"sum": sum, "min": min, "max": max}[function](values)
+    return result
+
+
+def format_aggregate(function, value, bound_column, table):
+    if value is None:
+        return ""
+    if function == "count":
+        return number_format(value, force_grouping=True)
+    if function == "avg" and isinstance(value, float):
+        value = round(value, 2)
+    # Columns such as CurrencyColumn format the total like their cells; renders that need a record cannot
+    rendered = call_with_appropriate(
+        bound_column.column.render,
+        {"value": value, "column": bound_column.column, "bound_column": bound_column, "table": table},
+    )
+    return localize(value) if rendered is None else rendered
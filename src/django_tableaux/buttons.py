@@ -1,7 +1,10 @@
+from functools import lru_cache
+
+from django.conf import settings
 from django.template.loader import render_to_string
 from django.utils.safestring import mark_safe
 from django.utils.text import slugify
-from .utils import get_template_path
+from .utils import get_template_library, get_template_path
 
 
 class Button:
@@ -24,16 +27,22 @@ class Button:
         self.context.update(kwargs)
 
     def render(self):
-        html = mark_safe(
-            render_to_string(
-                template_name=get_template_path(self.template_name),
-                context=self.context,
-            )
-        )
-        return html
+        if not settings.DEBUG:
+            # Buttons are rebuilt on every request but rarely change, so their html is cached by content
+            try:
+                return _render_cached(get_template_library(), self.template_name, tuple(sorted(self.context.items())))
+            except TypeError:
+                pass  # an unhashable context value
+        return mark_safe(render_to_string(template_name=get_template_path(self.template_name), context=self.context))
 
     def original_name(self):
         """
         Return the button name without the prefix added
         """
         return self.name[len(self.prefix) :]
+
+
+@lru_cache(maxsize=512)
+def _render_cached(library, template_name, items):
+    # library is part of the key so that a change of template library is not served stale html
+    return mark_safe(render_to_string(template_name=get_template_path(template_name), context=dict(items)))
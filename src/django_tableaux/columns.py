@@ -1,10 +1,19 @@
+import inspect
 import itertools
+import threading
+from collections import OrderedDict
+from decimal import Decimal
+from functools import wraps
 
 import django_tables2 as tables
 from django.contrib.humanize.templatetags.humanize import intcomma
+from django.utils import numberformat
+from django.utils.formats import get_format
 from django.utils.safestring import mark_safe
+from django.utils.translation import get_language
 
-from .utils import get_template_path
+from .instrumentation import count
+from .utils import get_template_path, page_offset
 
 
 class EditableColumn(tables.Column):
@@ -40,6 +49,9 @@ class CenteredTrueColumn(CenteredColumn):
             return "\u2705"
         return ""
 
+    def render_many(self, values):
+        return ["\u2705" if value else "" for value in values]
+
 
 class CenteredTrueFalseColumn(CenteredColumn):
     def render(self, value):
@@ -47,6 +59,9 @@ class CenteredTrueFalseColumn(CenteredColumn):
             return "\u2705"
         return "\u274c"
 
+    def render_many(self, values):
+        return ["\u2705" if value else "\u274c" for value in values]
+
 
 class CurrencyColumn(RightAlignedColumn):
     def __init__(self, **kwargs):
@@ -60,6 +75,11 @@ class CurrencyColumn(RightAlignedColumn):
             value = int(value)
         return mark_safe(f"{self.prefix}{intcomma(value)}{self.suffix}")
 
+    def render_many(self, values):
+        if self.integer:
+            values = [int(value) for value in values]
+        return [mark_safe(f"{self.prefix}{text}{self.suffix}") for text in intcomma_many(values)]
+
 
 class CheckBoxColumn(tables.TemplateColumn):
     def __init__(self, **kwargs):
@@ -77,7 +97,10 @@ class SelectionColumn(tables.TemplateColumn):
 
 
 class CounterColumn(tables.Column):
-    row_counter = None
+    """
+    The row number, continuing from the rows of earlier pages. The count is kept on the table
+    instance being rendered, never on the column, so concurrent renders cannot interleave.
+    """
 
     def __init__(self, **kwargs):
         kwargs["orderable"] = False
@@ -85,7 +108,184 @@ class CounterColumn(tables.Column):
         kwargs["verbose_name"] = ""
         super().__init__(**kwargs)
 
-    def render(self, value):
-        if not self.row_counter:
-            self.row_counter = itertools.count()
-        return next(self.row_counter) + 1
+    def render(self, table, bound_column):
+        counters = table.__dict__.setdefault("_tbx_counters", {})
+        if bound_column.name not in counters:
+            counters[bound_column.name] = itertools.count(_first_row_number(table))
+        return next(counters[bound_column.name])
+
+
+def _first_row_number(table) -> int:
+    """
+    The number of the first row rendered: after the row offset set by build_table, or the
+    start of the page of a table paginated by django-tables2
+    """
+    offset = getattr(table, "row_offset", None)
+    if offset is None:
+        page = getattr(table, "page", None)
+        offset = page_offset(page) if page else 0
+    return offset + 1
+
+
+def intcomma_many(values) -> list:
+    """
+    intcomma() for a list of values, looking up the locale's number formats once
+    """
+    lang = get_language()
+    decimal_sep = get_format("DECIMAL_SEPARATOR", lang, use_l10n=True)
+    grouping = get_format("NUMBER_GROUPING", lang, use_l10n=True)
+    thousand_sep = get_format("THOUSAND_SEPARATOR", lang, use_l10n=True)
+    result = []
+    for value in values:
+        if type(value) is int and grouping == 3:
+            result.append(f"{value:,}".replace(",", thousand_sep))
+        elif isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+            result.append(
+                numberformat.format(value, decimal_sep, None, grouping, thousand_sep, force_grouping=True, use_l10n=True)
+            )
+        else:
+            result.append(intcomma(value))
+    return result
+
+
+def batch_renderable(bound_column) -> bool:
+    """
+    True if the column's cells can come from its render_many(). Not when the table has a render_FOO
+    method or the column is linkified, or when render() is overridden by a class that does not also
+    override render_many(), because then the two would disagree.
+    """
+    column = bound_column.column
+    if bound_column.link or bound_column.render != column.render:
+        return False
+    mro = type(column).__mro__
+    many = next((i for i, klass in enumerate(mro) if "render_many" in vars(klass)), None)
+    return many is not None and many <= next(i for i, klass in enumerate(mro) if "render" in vars(klass))
+
+
+_EMPTY = object()
+
+
+def _batch_cells(table) -> dict:
+    """
+    {column name: {id(record): (record, cell)}} for the visible columns with render_many, over
+    the table's current page. Computed once per table.
+    """
+    if "_tbx_batch" not in table.__dict__:
+        columns = [
+            column
+            for column in table.columns
+            if column.name in getattr(table, "columns_visible", table.columns.names()) and batch_renderable(column)
+        ]
+        table._tbx_batch = {}
+        if columns:
+            rows = list(table.paginated_rows)
+            for bound_column in columns:
+                # Resolved as django-tables2 does, including get_FOO_display(); empty values keep the default
+                values = [
+                    row._get_and_render_with(bound_column, render_func=lambda _, value=None: value, default=_EMPTY)
+                    for row in rows
+                ]
+                present = [(row, value) for row, value in zip(rows, values) if value is not _EMPTY]
+                rendered = bound_column.column.render_many([value for _, value in present])
+                # The record is kept with its cell so that the id cannot be reused by another object
+                table._tbx_batch[bound_column.name] = {
+                    id(row.record): (row.record, cell) for (row, _), cell in zip(present, rendered)
+                }
+    return table._tbx_batch
+
+
+def row_cells(row):
+    """
+    Like row.items(): (bound column, cell) for each column. Cells of columns with render_many()
+    are formatted a page at a time.
+    """
+    batch = _batch_cells(row.table)
+    for column in row.table.columns:
+        record, cell = batch.get(column.name, {}).get(id(row.record), (None, None))
+        if record is row.record:
+            column.current_value = cell
+        else:
+            column.current_value = row.get_cell(column.name)
+        # Callable td attrs depend on the current record
+        column.current_record = row.record
+        yield column, column.current_value
+
+
+def cached_render(func=None, *, maxsize=1024, version=None):
+    """
+    Cache the output of a column's render() or a table's render_foo(), e.g.
+
+        @cached_render
+        def render_amount(self, value): ...
+
+        @cached_render(version="modified")
+        def render_notes(self, record): ...
+
+    Without version the output is cached by the cell value, so the method must not depend on
+    anything else. With version it is cached by the record's pk and the named field, which must
+    change whenever the output would. Entries are shared by every instance of the table or
+    column, kept per language, and at most maxsize are kept for each method. Hits and misses
+    are counted for the request recorder and by cache_info().
+    """
+    if func is None:
+        return lambda func: cached_render(func, maxsize=maxsize, version=version)
+
+    signature = inspect.signature(func)
+    takes_kwargs = any(param.kind == param.VAR_KEYWORD for param in signature.parameters.values())
+    needed = "record" if version else "value"
+    entries = OrderedDict()
+    lock = threading.Lock()
+    stats = {"hits": 0, "misses": 0}
+    name = f"render_cache.{func.__qualname__}"
+
+    @wraps(func)
+    def wrapper(self, **kwargs):
+        if version:
+            content = (kwargs["record"].pk, getattr(kwargs["record"], version))
+        else:
+            content = kwargs["value"]
+        if not takes_kwargs:
+            kwargs = {key: value for key, value in kwargs.items() if key in signature.parameters}
+        # creation_counter tells apart columns of the same class declared with different options
+        key = (type(self), getattr(self, "creation_counter", None), get_language(), content)
+        try:
+            hash(key)
+        except TypeError:
+            return func(self, **kwargs)
+        with lock:
+            hit = key in entries
+            if hit:
+                entries.move_to_end(key)
+                result = entries[key]
+                stats["hits"] += 1
+            else:
+                stats["misses"] += 1
+        if hit:
+            count(f"{name}.hits")
+            return result
+        count(f"{name}.misses")
+        result = func(self, **kwargs)
+        with lock:
+            entries[key] = result
+            if len(entries) > maxsize:
+                entries.popitem(last=False)
+        return result
+
+    def cache_info():
+        with lock:
+            return {**stats, "maxsize": maxsize, "currsize": len(entries)}
+
+    def cache_clear():
+        with lock:
+            entries.clear()
+            stats.update(hits=0, misses=0)
+
+    # django-tables2 passes only the arguments a render method declares, so ask for the key's too
+    if needed not in signature.parameters and not takes_kwargs:
+        extra = inspect.Parameter(needed, inspect.Parameter.KEYWORD_ONLY)
+        wrapper.__signature__ = signature.replace(parameters=[*signature.parameters.values(), extra])
+    else:
+        wrapper.__signature__ = signature
+    wrapper.cache_info = cache_info
+    wrapper.cache_clear = cache_clear
+    return wrapper
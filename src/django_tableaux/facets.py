@@ -0,0 +1,114 @@
+"""
+Row counts against the choices of filter widgets, e.g. "Open (1,204)".
+"""
+
+from django.db.models import CharField, Count, IntegerField, Value
+from django.db.models.functions import Cast
+from django.utils.formats import number_format
+from django_filters.constants import EMPTY_VALUES
+from django_filters.filters import BooleanFilter, ChoiceFilter, ModelChoiceFilter
+
+# ModelChoiceFilter is a ChoiceFilter
+FACET_FILTERS = (ChoiceFilter, BooleanFilter)
+
+
+def facet_filters(filterset, names=None) -> dict:
+    """
+    Return the filters of the filterset that can be counted: choice, boolean and foreign key filters
+    that compare one field for equality. names restricts them further.
+    """
+    result = {}
+    for name, filter_ in filterset.filters.items():
+        if names is not None and name not in names:
+            continue
+        if (
+            isinstance(filter_, FACET_FILTERS)
+            and not filter_.method
+            and not filter_.exclude
+            and filter_.lookup_expr == "exact"
+        ):
+            result[name] = filter_
+    return result
+
+
+def _facet_key(filter_):
+    # Keys of every facet share one text column so the counts can be combined in a UNION
+    if isinstance(filter_, BooleanFilter):
+        # An integer first so that every database spells the key "1" or "0"
+        return Cast(Cast(filter_.field_name, IntegerField()), CharField())
+    return Cast(filter_.field_name, CharField())
+
+
+def count_facets(queryset, filters, values) -> dict:
+    """
+    Count the rows for each choice of each filter with one query, a UNION ALL of one GROUP BY per filter.
+    Each filter is counted over the queryset narrowed by the values of the other filters but not its own,
+    so its counts show what choosing another value would return.
+    values maps filter names to cleaned values. Returns {filter name: {key: count}} with keys as text.
+    """
+    parts = []
+    for name, filter_ in filters.items():
+        narrowed = queryset
+        for other, other_filter in filters.items():
+            if other != name and values.get(other) not in EMPTY_VALUES:
+                narrowed = narrowed.filter(**{other_filter.field_name: values[other]})
+        parts.append(
+            narrowed.order_by()
+            .values(tbx_facet=Value(name), tbx_key=_facet_key(filter_))
+            .annotate(tbx_count=Count("pk"))
+            .values_list("tbx_facet", "tbx_key", "tbx_count")
+        )
+    counts = {name: {} for name in filters}
+    if not parts:
+        return counts
+    query = parts[0].union(*parts[1:], all=True) if len(parts) > 1 else parts[0]
+    for name, key, count in query:
+        counts[name][key] = count
+    return counts
+
+
+def counted(label, count) -> str:
+    return f"{label} ({number_format(count, force_grouping=True)})"
+
+
+def label_choices(form, filters, counts):
+    """
+    Append counts to the choice labels of the filters' form fields.
+    counts can be lazy; labels are only built when the widgets are rendered.
+    """
+    for name, filter_ in filters.items():
+        field = form.fields.get(name)
+        if field is None:
+            continue
+        if isinstance(filter_, ModelChoiceFilter):
+            field.label_from_instance = _model_label(field.label_from_instance, counts, name)
+        elif isinstance(filter_, BooleanFilter):
+            keys = {"true": "1", "false": "0"}
+            field.widget.choices = _choice_labels(list(field.widget.choices), counts, name, keys)
+        else:
+            # django-filter's ChoiceField adds its empty and null choices to whatever choices it is given
+            extra = ("", getattr(field, "null_value", ""))
+            choices = [choice for choice in field.choices if choice[0] not in extra]
+            field.choices = _choice_labels(choices, counts, name)
+
+
+def _model_label(label_from_instance, counts, name):
+    def label(obj):
+        return counted(label_from_instance(obj), counts[name].get(str(obj.pk), 0))
+
+    return label
+
+
+def _choice_labels(choices, counts, name, keys=None):
+    def labelled():
+        result = []
+        for value, label in choices:
+            key = keys.get(value) if keys else str(value)
+            # Empty choices and option groups are left as they are
+            if key is None or value in EMPTY_VALUES or isinstance(label, (list, tuple)):
+                result.append((value, label))
+            else:
+                result.append((value, counted(label, counts[name].get(key, 0))))
+        return result
+
+    return labelled
@@ -1,7 +1,10 @@
 # This file handles all the hx-get requests coming from a tableaux
 # self refers to the view instance
 
+import json
+
 from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
 from django.template.response import TemplateResponse
 from django_htmx.http import HttpResponseClientRedirect
 
@@ -10,6 +13,7 @@ from django_tableaux.utils import (
     save_columns_dict,
     default_columns_dict,
     set_column,
+    set_columns,
     visible_columns,
     set_select_column,
 )
@@ -18,6 +22,12 @@ from django_tableaux.utils import (
 def get_htmx(self, request, *args, **kwargs):
     self._bp = self.query_dict.get("bp", "XXX")
     self._apply_responsive_settings()
+    # Speculative request from the client to warm the cache with the next page
+    prefetch = self.query_dict.pop("_prefetch", None) is not None
+    # With client_columns, unsaved column changes travel with the next request
+    columns = self.query_dict.pop("_columns", None)
+    if columns is not None and self.client_columns:
+        save_client_columns(self, request, columns.split(","))
 
     # Some actions depend on trigger_name; others on trigger
     trigger_name = request.htmx.trigger_name
@@ -28,14 +38,19 @@ def get_htmx(self, request, *args, **kwargs):
             case "table_load":
                 # Initiated by tableaux template tag — needs the outer wrapper
                 target = request.htmx.target[len(self.prefix) :] if self.prefix else request.htmx.target
+                # A batch load returns the wrapper as an out-of-band swap, see TableauxBatchView
+                self.batch_load = "_batch" in request.GET
+                self.query_dict.pop("_batch", None)
                 return self.render_tableaux(hx_target=target, outer=True)
 
             case "filter_modal" if self.filterset_class:
                 # Request to show the filter form in a modal
                 url = f"{request.path}?bp={self._bp}" if self._bp else request.path
+                filterset = self.get_filterset(self.get_queryset())
+                self.add_facet_counts(filterset)
                 context = {
                     "prefix": self.prefix,
-                    "filter": self.get_filterset(self.get_queryset()),
+                    "filter": filterset,
                     "filter_button": self.filter_button,
                     "url": url,
                 }
@@ -88,6 +103,26 @@ def get_htmx(self, request, *args, **kwargs):
                 self.query_dict["~page"] = "1"
                 return self.render_tableaux()
 
+            case trigger if "~search~" in trigger:
+                # global search changed; the toolbar search box is kept as typed, see django_tableaux.js
+                self._filter_changed = True
+                self.query_dict["~page"] = "1"
+                return self.render_fragments("search")
+
+            case trigger if "~group~" in trigger:
+                # grouping column chosen
+                self._filter_changed = True
+                self.query_dict["~page"] = "1"
+                return self.render_tableaux()
+
+            case trigger if "~grp~" in trigger:
+                # group header expanded for the first time
+                try:
+                    key = json.loads(self.query_dict.pop("_group", "null"))
+                except json.JSONDecodeError:
+                    raise ValueError(f"Bad htmx get request. Trigger: {trigger} Group: {request.GET.get('_group')}")
+                return self.render_group_rows(key)
+
             case trigger if "~remove~" in trigger:
                 # remove a single filter
                 self.query_dict.pop(param)
@@ -95,6 +130,10 @@ def get_htmx(self, request, *args, **kwargs):
                 self.query_dict["~page"] = "1"
                 return self.render_tableaux()
 
+            case trigger if "~cols~" in trigger:
+                # Column visibility already changed in the browser and was saved above
+                return HttpResponse(status=204)
+
             case trigger if "~col~" in trigger:
                 # Switch column visibility on or off
                 col_name = param
@@ -133,22 +172,32 @@ def get_htmx(self, request, *args, **kwargs):
                     value = param
                 self.query_dict[key] = value
                 self._order_by_changed = True
-                return self.render_tableaux()
+                return self.render_fragments("sort")
 
             case trigger if "~page~" in trigger:
                 # new page
                 self.query_dict["~page"] = param
-                return self.render_template(
-                    template_name=self.templates["tableaux_page_oob"],
-                    hx_target="page_wrapper",
-                )
+                return self.render_fragments("page", prefetch)
+
+            case trigger if "_range_" in trigger:
+                # windowed infinite scroll fetching rows back into view
+                start, _, end = self.query_dict.pop("_range", "").partition("-")
+                try:
+                    start, end = int(start), int(end)
+                except ValueError:
+                    raise ValueError(f"Bad row range in request. Trigger: {trigger}")
+                if not 0 <= start < end or end - start > max(self.window_rows, int(self.per_page)):
+                    raise ValueError(f"Row range {start}-{end} out of bounds. Trigger: {trigger}")
+                return self.render_row_range(start, end)
 
             case trigger if "_tr_" in trigger:
                 # infinite scroll/load_more or click on row
                 if "_scroll" in request.GET:
                     page = int(self.query_dict.get("_pagex", 1)) + 1
                     self.query_dict["~page"] = str(page)
-                    return self.render_template(self.templates["tableaux_rows"], update_url=False)
+                    return self.render_prefetchable(
+                        prefetch, template_name=self.templates["tableaux_rows"], update_url=False
+                    )
 
                 return self.row_clicked(
                     pk=trigger.split("_")[1],
@@ -180,6 +229,7 @@ def get_htmx(self, request, *args, **kwargs):
                         self.table_class,
                         self.get_breakpoint_values(),
                         self._bp,
+                        include_optional=self.client_columns,
                     )[int(bits[2])],
                     target=request.htmx.target,
                 )
@@ -192,6 +242,7 @@ def get_htmx(self, request, *args, **kwargs):
                     self.table_class,
                     self.get_breakpoint_values(),
                     self._bp,
+                    include_optional=self.client_columns,
                 )
                 index = int(bits[2])
                 # todo this is a bit of a hack here
@@ -220,3 +271,13 @@ def get_htmx(self, request, *args, **kwargs):
                 pass
 
     raise ValueError(f"Bad htmx get request. Trigger: {trigger} Trigger name: {trigger_name}")
+
+
+def save_client_columns(self, request, shown):
+    """
+    Save the visibility of every optional column; shown lists those ticked in the browser
+    """
+    table = self.get_table_class()(data=[])
+    set_select_column(table)
+    define_columns(table, self.get_breakpoint_values(), self._bp)
+    set_columns(request, table, self._bp, {col: col in shown for col in table.columns_optional})
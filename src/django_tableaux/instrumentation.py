@@ -0,0 +1,54 @@
+"""
+Lightweight timing of the stages of a tableaux request.
+Nothing is collected unless a recording is active, so the calls cost almost nothing otherwise.
+See TableauxRecorderMiddleware and the tableaux_replay management command.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_current = ContextVar("tableaux_recording", default=None)
+
+
+@contextmanager
+def recording():
+    """
+    Collect stage timings (milliseconds), counters and events for the code run inside the block
+    """
+    record = {"stages": {}, "counters": {}, "events": []}
+    token = _current.set(record)
+    try:
+        yield record
+    finally:
+        _current.reset(token)
+
+
+def current_recording():
+    return _current.get()
+
+
+@contextmanager
+def stage(name: str):
+    record = _current.get()
+    if record is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = (time.perf_counter() - start) * 1000
+        record["stages"][name] = record["stages"].get(name, 0) + elapsed
+
+
+def record_event(name: str, **data):
+    record = _current.get()
+    if record is not None:
+        record["events"].append({"event": name, **data})
+
+
+def count(name: str, n: int = 1):
+    record = _current.get()
+    if record is not None:
+        record["counters"][name] = record["counters"].get(name, 0) + n
@@ -0,0 +1,78 @@
+import django_tables2 as tables
+from django.template.loader import render_to_string
+from django.utils.formats import localize
+from django.utils.html import conditional_escape
+from django.utils.safestring import SafeData
+
+from .columns import row_cells
+from .templatetags.django_tableaux import td_attr
+
+
+def has_plain_render(bound_column) -> bool:
+    """
+    True if the column renders its value unchanged, so the cell can be sent as text.
+    Custom Column.render methods, render_FOO methods on the table and linkify all produce html.
+    """
+    return getattr(bound_column.render, "__func__", None) is tables.Column.render and not bound_column.link
+
+
+def cell_value(bound_column, cell):
+    # Mirrors the localize handling in tableaux_row.html
+    if bound_column.localize is None:
+        return localize(cell)
+    return localize(cell, use_l10n=bool(bound_column.localize))
+
+
+def _compact(values: list):
+    # A list that repeats one value is sent as that value
+    return values[0] if values and values.count(values[0]) == len(values) else values
+
+
+def rows_json(table, context, request=None) -> dict:
+    """
+    Serialize the current page of rows as columnar data that django_tableaux.js turns back into
+    the same html as tableaux_rows.html.
+    Column names and attributes are sent once and each column's cells form one array.
+    Cells are plain text unless the column has custom render logic, in which case the rendered html is sent.
+    The trailing rows (load more, spacers) and the infinite scroll attributes of the last row are
+    rendered from the usual templates.
+    """
+    templates = context["templates"]
+    columns = [column for column in table.columns if column.name in table.columns_visible]
+    plain = [has_plain_render(column) for column in columns]
+    pks = []
+    row_attrs = []
+    attr_index = {}
+    td = [[] for _ in columns]
+    values = [[] for _ in columns]
+    row = None
+    for row in table.paginated_rows:
+        pks.append(row.record.id)
+        attrs = row.attrs.as_html()
+        row_attrs.append(attr_index.setdefault(attrs, len(attr_index)))
+        # row_cells() sets the column's current record, which callable td attrs depend on
+        cells = {column.name: cell for column, cell in row_cells(row)}
+        for i, column in enumerate(columns):
+            td[i].append(str(td_attr(column, table)))
+            values[i].append(cell_value(column, cells[column.name]))
+
+    html = []
+    for i, column_values in enumerate(values):
+        as_html = not plain[i] or any(isinstance(value, SafeData) for value in column_values)
+        html.append(as_html)
+        values[i] = [str(conditional_escape(value) if as_html else value) for value in column_values]
+
+    row_context = {**context, "row": row}
+    return {
+        "prefix": table.prefix,
+        "columns": [column.name for column in columns],
+        "pks": pks,
+        "attrs": list(attr_index),
+        "row_attrs": row_attrs,
+        "td": [_compact(column_attrs) for column_attrs in td],
+        "html": html,
+        "values": values,
+        "offset": table.row_offset if table.window_rows else None,
+        "last": render_to_string(templates["tableaux_row_sentinel"], row_context, request).strip(),
+        "tail": render_to_string(templates["tableaux_rows_tail"], row_context, request).strip(),
+    }
@@ -0,0 +1,251 @@
+from typing import NamedTuple
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections, migrations
+from django.db.backends.utils import names_digest, split_identifier
+from django.db.migrations.autodetector import MigrationAutodetector
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.writer import MigrationWriter
+from django.db.models import F, Index, UniqueConstraint
+from django.db.models.functions import Upper
+from django.urls import URLPattern, URLResolver, get_resolver
+from django_filters.filterset import filterset_factory
+
+from django_tableaux.views import TableauxView
+
+# Lookups a B-tree index cannot serve; on PostgreSQL a trigram GIN index can
+TEXT_SEARCH_LOOKUPS = {"contains", "icontains", "iexact", "istartswith", "endswith", "iendswith", "regex", "iregex"}
+# Django compares UPPER(column::text) for these on PostgreSQL, so the index must be on that expression
+UPPER_LOOKUPS = {"icontains", "iexact", "istartswith", "iendswith"}
+
+
+class Usage(NamedTuple):
+    view: str
+    model: type
+    path: str  # ORM path relative to the view's model, e.g. "customer__name"
+    lookup: str  # "order_by" or a filter lookup such as "icontains"
+
+
+def tableaux_views(patterns=None, prefix=""):
+    """
+    Yield (url name, view class) for every TableauxView subclass routed in the url conf
+    """
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            namespace = f"{pattern.namespace}:" if pattern.namespace else ""
+            yield from tableaux_views(pattern.url_patterns, prefix + namespace)
+        elif isinstance(pattern, URLPattern):
+            view_class = getattr(pattern.callback, "view_class", None)
+            if isinstance(view_class, type) and issubclass(view_class, TableauxView):
+                yield f"{prefix}{pattern.name or view_class.__name__}", view_class
+
+
+def view_usages(name, view_class):
+    """
+    Yield a Usage for each way the view can order or filter its queryset
+    """
+    view = view_class()
+    try:
+        queryset = view.get_queryset()
+        table_class = view.get_table_class()
+    except (ImproperlyConfigured, AttributeError):
+        # get_queryset may depend on the request
+        return
+    model = queryset.model
+
+    table = table_class(data=queryset.none())
+    for column in table.columns:
+        if column.orderable:
+            for order_by in column.order_by:
+                yield Usage(name, model, order_by.bare.replace(".", "__"), "order_by")
+    default_order = table_class._meta.order_by or model._meta.ordering or ()
+    if isinstance(default_order, str):
+        default_order = default_order.split(",")
+    for order_by in default_order:
+        yield Usage(name, model, order_by.lstrip("-").replace(".", "__"), "order_by")
+
+    filterset_class = view_class.filterset_class
+    if filterset_class is None and view_class.filterset_fields:
+        filterset_class = filterset_factory(model, fields=view_class.filterset_fields)
+    if filterset_class is not None:
+        for filter_ in filterset_class.base_filters.values():
+            # Filters with a method run arbitrary code that cannot be analysed
+            if filter_.field_name and not filter_.method:
+                yield Usage(name, model, filter_.field_name, filter_.lookup_expr)
+
+
+def resolve_field(model, path):
+    """
+    Return (model, field) for the last field in an ORM path, or None if it is not a concrete field
+    """
+    field = None
+    for part in path.split("__"):
+        if field is not None:
+            if not field.is_relation:
+                return None
+            model = field.related_model
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return None
+    if field is None or not field.concrete:
+        return None
+    return model, field
+
+
+def _is_trigram_index(index, field, upper) -> bool:
+    """
+    True if index is a trigram GIN index that serves lookups on field, or on UPPER(field) with upper
+    """
+    if type(index).__name__ != "GinIndex":
+        return False
+    if not upper:
+        if field.name not in index.fields:
+            return False
+        position = index.fields.index(field.name)
+        return position < len(index.opclasses) and index.opclasses[position] == "gin_trgm_ops"
+    for expression in index.expressions:
+        # OpClass(Upper("name"), name="gin_trgm_ops")
+        if type(expression).__name__ != "OpClass" or expression.extra.get("name") != "gin_trgm_ops":
+            continue
+        inner = expression.get_source_expressions()[0]
+        if isinstance(inner, Upper) and inner.get_source_expressions() == [F(field.name)]:
+            return True
+    return False
+
+
+def is_indexed(model, field, lookup):
+    if lookup in TEXT_SEARCH_LOOKUPS:
+        return any(_is_trigram_index(index, field, lookup in UPPER_LOOKUPS) for index in model._meta.indexes)
+    if field.primary_key or field.unique or field.db_index:
+        return True
+    leading = [index.fields for index in model._meta.indexes if index.fields]
+    leading += [list(fields) for fields in model._meta.unique_together]
+    leading += [
+        constraint.fields
+        for constraint in model._meta.constraints
+        if isinstance(constraint, UniqueConstraint) and constraint.fields
+    ]
+    # Only an index that starts with the field can be used on its own
+    return any(fields[0].lstrip("-") == field.name for fields in leading)
+
+
+def suggest_index(model, field, lookup, vendor):
+    if lookup in TEXT_SEARCH_LOOKUPS:
+        if vendor != "postgresql":
+            return None
+        # Imported here because django.contrib.postgres needs psycopg
+        from django.contrib.postgres.indexes import GinIndex, OpClass
+
+        if lookup in UPPER_LOOKUPS:
+            # set_name_with_model needs fields, so expression indexes are named the same way by hand
+            _, table = split_identifier(model._meta.db_table)
+            digest = names_digest(table, field.column, "upper", "gin", length=6)
+            name = f"{table[:11]}_{field.column[:7]}_{digest}_gin"
+            return GinIndex(OpClass(Upper(field.name), name="gin_trgm_ops"), name=name)
+        index = GinIndex(fields=[field.name], opclasses=["gin_trgm_ops"], name="tbx")
+    else:
+        index = Index(fields=[field.name], name="tbx")
+    index.set_name_with_model(model)
+    return index
+
+
+def migration_position(graph, app_label):
+    """
+    Return (number, dependencies) for a new migration of the app: after the highest numbered
+    migration, depending on every leaf so that it merges any branches
+    """
+    numbers = [MigrationAutodetector.parse_number(name) or 0 for app, name in graph.nodes if app == app_label]
+    return max(numbers, default=0) + 1, sorted(graph.leaf_nodes(app_label))
+
+
+def explain(queryset, usage, using):
+    """
+    EXPLAIN a representative query for the usage and return a short verdict on the plan
+    """
+    queryset = queryset.using(using)
+    if usage.lookup == "order_by":
+        queryset = queryset.order_by(usage.path)[:20]
+    else:
+        sample = queryset.exclude(**{f"{usage.path}__isnull": True}).values_list(usage.path, flat=True).first()
+        if sample is None:
+            return "no data"
+        if usage.lookup in TEXT_SEARCH_LOOKUPS:
+            sample = str(sample)[:3]
+        queryset = queryset.filter(**{f"{usage.path}__{usage.lookup}": sample})
+    try:
+        plan = queryset.explain()
+    except (DatabaseError, ValueError, TypeError) as e:
+        return f"explain failed: {e}"
+    if "Seq Scan" in plan or "TEMP B-TREE" in plan:
+        return "full scan or sort"
+    if any(line.strip().startswith("SCAN") and "USING" not in line for line in plan.splitlines()):
+        return "full scan or sort"
+    return "uses index"
+
+
+class Command(BaseCommand):
+    help = "Report ordering and filtering in TableauxViews that no database index supports"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS, help="Database to EXPLAIN queries against")
+        parser.add_argument("--no-explain", action="store_true", help="Only inspect model indexes; run no queries")
+        parser.add_argument(
+            "--emit-migration", action="store_true", help="Write a migration per app adding the suggested indexes"
+        )
+        parser.add_argument("--dry-run", action="store_true", help="With --emit-migration, print instead of write")
+
+    def handle(self, *args, **options):
+        using = options["database"]
+        vendor = connections[using].vendor
+        suggestions = {}
+        seen = set()
+        for name, view_class in tableaux_views():
+            for usage in view_usages(name, view_class):
+                resolved = resolve_field(usage.model, usage.path)
+                if resolved is None or (name, usage.path, usage.lookup) in seen:
+                    continue
+                seen.add((name, usage.path, usage.lookup))
+                model, field = resolved
+                if is_indexed(model, field, usage.lookup):
+                    continue
+                plan = "" if options["no_explain"] else explain(usage.model._default_manager.all(), usage, using)
+                index = suggest_index(model, field, usage.lookup, vendor)
+                advice = f"add {type(index).__name__} {index.name}" if index else "no index can help this lookup"
+                self.stdout.write(
+                    f"{name}: {usage.lookup} on {usage.path} "
+                    f"({model._meta.label}.{field.name}) is not indexed; {advice}" + (f" [{plan}]" if plan else "")
+                )
+                if index:
+                    suggestions.setdefault(model._meta.app_label, {})[index.name] = (model, index)
+
+        if not seen:
+            self.stdout.write("No TableauxView urls found.")
+        elif not suggestions:
+            self.stdout.write(self.style.SUCCESS("No missing indexes found."))
+        if options["emit_migration"]:
+            for app_label, indexes in suggestions.items():
+                self.write_migration(app_label, indexes.values(), vendor, options["dry_run"])
+
+    def write_migration(self, app_label, indexes, vendor, dry_run):
+        loader = MigrationLoader(None, ignore_no_migrations=True)
+        number, dependencies = migration_position(loader.graph, app_label)
+        migration = migrations.Migration(f"{number:04d}_tableaux_indexes", app_label)
+        migration.dependencies = dependencies
+        operations = []
+        if vendor == "postgresql" and any(type(index).__name__ == "GinIndex" for _, index in indexes):
+            from django.contrib.postgres.operations import TrigramExtension
+
+            operations.append(TrigramExtension())
+        operations += [migrations.AddIndex(model_name=model._meta.model_name, index=index) for model, index in indexes]
+        migration.operations = operations
+        writer = MigrationWriter(migration)
+        if dry_run:
+            self.stdout.write(f"# {writer.path}\n{writer.as_string()}")
+            return
+        with open(writer.path, "w", encoding="utf-8") as file:
+            file.write(writer.as_string())
+        self.stdout.write(self.style.SUCCESS(f"Wrote {writer.path}"))
@@ -0,0 +1,164 @@
+import cProfile
+import io
+import json
+import pstats
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.urls import Resolver404, resolve
+from django_htmx.middleware import HtmxDetails
+
+from django_tableaux.instrumentation import recording, stage
+from django_tableaux.middleware import REPLAYABLE_METHODS
+
+STAGES = ("filter", "table", "context", "json", "render")
+
+
+def load_samples(path, match=None, limit=None):
+    samples = []
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            if not line.strip():
+                continue
+            sample = json.loads(line)
+            # Samples from before the method was recorded are GET requests
+            if sample.get("method", "GET") not in REPLAYABLE_METHODS:
+                continue
+            if match and match not in sample["path"] and match not in (sample.get("trigger") or ""):
+                continue
+            samples.append(sample)
+            if limit and len(samples) >= limit:
+                break
+    return samples
+
+
+def build_request(sample, user=None):
+    """
+    Rebuild a request from a sample the way the middleware stack would have presented it to the view
+    """
+    headers = {}
+    if sample.get("htmx"):
+        headers["HX-Request"] = "true"
+        for key, header in (
+            ("trigger", "HX-Trigger"),
+            ("trigger_name", "HX-Trigger-Name"),
+            ("target", "HX-Target"),
+            ("current_url", "HX-Current-URL"),
+        ):
+            if sample.get(key):
+                headers[header] = sample[key]
+    factory = RequestFactory()
+    build = factory.head if sample.get("method") == "HEAD" else factory.get
+    request = build(sample["path"], sample["params"], headers=headers)
+    request.session = import_module(settings.SESSION_ENGINE).SessionStore()
+    request.user = user or AnonymousUser()
+    request.htmx = HtmxDetails(request)
+    return request
+
+
+def replay(sample, user=None):
+    """
+    Run one sample through its view and return (status, total ms, stage timings)
+    """
+    request = build_request(sample, user)
+    try:
+        match = resolve(request.path_info)
+    except Resolver404:
+        raise CommandError(f"No url matches {sample['path']}")
+    with recording() as record:
+        start = time.perf_counter()
+        response = match.func(request, *match.args, **match.kwargs)
+        if hasattr(response, "render"):
+            with stage("render"):
+                response.render()
+        total_ms = (time.perf_counter() - start) * 1000
+    return response.status_code, total_ms, record["stages"]
+
+
+class Command(BaseCommand):
+    help = "Replay tableaux requests recorded by TableauxRecorderMiddleware and profile them"
+
+    def add_arguments(self, parser):
+        parser.add_argument("recording", help="JSON lines file written by TableauxRecorderMiddleware")
+        parser.add_argument("--match", help="Only replay samples whose path or trigger contains this text")
+        parser.add_argument("--limit", type=int, help="Replay at most this many samples")
+        parser.add_argument("--repeat", type=int, default=1, help="Replay each sample this many times")
+        parser.add_argument("--user", help="Username to replay as; anonymous by default")
+        parser.add_argument(
+            "--profiler",
+            choices=("cprofile", "pyinstrument", "none"),
+            default="cprofile",
+            help="Profiler to run the replay under",
+        )
+        parser.add_argument("--sort", default="cumulative", help="cProfile sort order")
+        parser.add_argument("--lines", type=int, default=30, help="Number of cProfile lines to print")
+
+    def handle(self, *args, **options):
+        try:
+            samples = load_samples(options["recording"], options["match"], options["limit"])
+        except OSError as e:
+            raise CommandError(f"Cannot read {options['recording']}: {e}")
+        if not samples:
+            self.stdout.write("No samples to replay.")
+            return
+        user = None
+        if options["user"]:
+            User = get_user_model()
+            try:
+                user = User._default_manager.get_by_natural_key(options["user"])
+            except User.DoesNotExist:
+                raise CommandError(f"No user {options['user']}")
+
+        profiler = self.start_profiler(options["profiler"])
+        totals = {}
+        for sample in samples:
+            for _ in range(options["repeat"]):
+                status, total_ms, stages = replay(sample, user)
+                self.stdout.write(self.format_result(sample, status, total_ms, stages))
+                for name, ms in stages.items():
+                    totals[name] = totals.get(name, 0) + ms
+                totals["total"] = totals.get("total", 0) + total_ms
+        self.stop_profiler(profiler, options)
+
+        count = len(samples) * options["repeat"]
+        means = ", ".join(f"{name} {ms / count:.1f}ms" for name, ms in totals.items())
+        self.stdout.write(self.style.SUCCESS(f"Replayed {count} requests; mean {means}"))
+
+    @staticmethod
+    def format_result(sample, status, total_ms, stages):
+        timings = " ".join(f"{name}={stages[name]:.1f}" for name in STAGES if name in stages)
+        recorded = f" (recorded {sample['total_ms']:.1f}ms)" if "total_ms" in sample else ""
+        return f"{status} {sample['path']} {sample.get('trigger') or '-'} {total_ms:.1f}ms{recorded} {timings}"
+
+    @staticmethod
+    def start_profiler(name):
+        if name == "cprofile":
+            profiler = cProfile.Profile()
+            profiler.enable()
+            return profiler
+        if name == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                raise CommandError("pyinstrument is not installed")
+            profiler = Profiler()
+            profiler.start()
+            return profiler
+        return None
+
+    def stop_profiler(self, profiler, options):
+        if profiler is None:
+            return
+        if options["profiler"] == "cprofile":
+            profiler.disable()
+            stream = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats(options["sort"]).print_stats(options["lines"])
+            self.stdout.write(stream.getvalue())
+        else:
+            profiler.stop()
+            self.stdout.write(profiler.output_text(unicode=True, color=False))
@@ -0,0 +1,46 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from django_tableaux.management.commands.tableaux_index_advisor import tableaux_views
+from django_tableaux.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Build or refresh the search index of every TableauxView with search_fields"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS, help="Database to build the indexes in")
+        parser.add_argument("--drop", action="store_true", help="Drop the indexes instead")
+
+    def handle(self, *args, **options):
+        using = options["database"]
+        done = set()
+        for name, view_class in tableaux_views():
+            if not view_class.search_fields:
+                continue
+            try:
+                model = view_class().get_queryset().model
+            except (ImproperlyConfigured, AttributeError):
+                self.stderr.write(f"{name}: skipped, its queryset depends on the request")
+                continue
+            fields = tuple(view_class.search_fields)
+            backend_name = view_class.search_backend
+            if backend_name is None:
+                # Choose as if the index already exists, which is what we are about to make true
+                backend_name = {"postgresql": "postgres", "sqlite": "sqlite"}.get(connections[using].vendor, "naive")
+            backend = get_search_backend(backend_name, model, fields, using)
+            if (type(backend), model, fields) in done:
+                continue
+            done.add((type(backend), model, fields))
+            try:
+                if options["drop"]:
+                    result = backend.drop_index(model, fields, using)
+                else:
+                    result = backend.build_index(model, fields, using)
+            except ImproperlyConfigured as e:
+                raise CommandError(f"{name}: {e}")
+            self.stdout.write(f"{name}: {result}")
+        if not done:
+            self.stdout.write("No TableauxView with search_fields found.")
+
@@ -0,0 +1,98 @@
+import json
+import random
+import threading
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .instrumentation import current_recording, recording
+
+_write_lock = threading.Lock()
+
+# Requests that can be replayed from their query parameters; the body of a POST is not recorded
+REPLAYABLE_METHODS = ("GET", "HEAD")
+
+
+def request_sample(request, record, status, total_ms) -> dict:
+    """
+    What a sampled request is replayed from: no cookies, session or user are stored
+    """
+    params = {key: request.GET.getlist(key) for key in sorted(request.GET)}
+    return {
+        "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "method": request.method,
+        "path": request.path,
+        "trigger": request.headers.get("HX-Trigger"),
+        "trigger_name": request.headers.get("HX-Trigger-Name"),
+        "target": request.headers.get("HX-Target"),
+        "current_url": request.headers.get("HX-Current-URL"),
+        "htmx": request.headers.get("HX-Request") == "true",
+        "params": params,
+        # Non-empty state, handy for grouping samples of the same filter and sort combination
+        "state": {key: values for key, values in params.items() if key.startswith("~") and any(values)},
+        "bp": request.GET.get("bp", ""),
+        "status": status,
+        "total_ms": round(total_ms, 2),
+        "stages": {name: round(ms, 2) for name, ms in record["stages"].items()},
+        "counters": record["counters"],
+        "events": record["events"],
+    }
+
+
+class TableauxRecorderMiddleware:
+    """
+    Append a sample of requests handled by TableauxViews to a JSON lines file for tableaux_replay.
+    Configure in settings:
+        DJANGO_TABLEAUX = {"record_file": "tableaux.jsonl", "record_sample_rate": 0.1}
+    Only GET and HEAD requests are sampled. Without record_file the middleware removes itself.
+    """
+
+    def __init__(self, get_response):
+        config = getattr(settings, "DJANGO_TABLEAUX", {})
+        self.path = config.get("record_file")
+        if not self.path:
+            raise MiddlewareNotUsed
+        self.sample_rate = float(config.get("record_sample_rate", 1.0))
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method not in REPLAYABLE_METHODS or random.random() >= self.sample_rate:
+            return self.get_response(request)
+        with recording() as record:
+            start = time.perf_counter()
+            response = self.get_response(request)
+            total_ms = (time.perf_counter() - start) * 1000
+        if self.is_tableaux(request):
+            if "view" in record["stages"]:
+                record["stages"]["render"] = total_ms - record["stages"]["view"]
+            self.write(request_sample(request, record, response.status_code, total_ms))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        record = current_recording()
+        if record is not None:
+            record["view_start"] = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # Called after the view returns and before the template is rendered;
+        # "render" is then the rest of the total, including any later middleware
+        record = current_recording()
+        if record is not None and "view_start" in record:
+            record["stages"]["view"] = (time.perf_counter() - record.pop("view_start")) * 1000
+        return response
+
+    @staticmethod
+    def is_tableaux(request) -> bool:
+        from .views import TableauxView
+
+        match = getattr(request, "resolver_match", None)
+        view_class = getattr(getattr(match, "func", None), "view_class", None)
+        return isinstance(view_class, type) and issubclass(view_class, TableauxView)
+
+    def write(self, sample):
+        line = json.dumps(sample, default=str)
+        with _write_lock:
+            with open(self.path, "a", encoding="utf-8") as file:
+                file.write(line + "\n")
@@ -0,0 +1,201 @@
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.core.paginator import Page, Paginator
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+from django.db.models import QuerySet
+from django_tables2.rows import BoundRows
+
+
+def can_run_concurrently(queryset) -> bool:
+    """
+    Return True if queries for this queryset can safely be issued on a second connection.
+    SQLite is excluded because the test database is in memory and writers lock the whole file,
+    and an open transaction is excluded because another connection would not see its rows.
+    """
+    if not isinstance(queryset, QuerySet):
+        return False
+    return connection_allows_concurrency(queryset.db)
+
+
+def connection_allows_concurrency(alias: str = DEFAULT_DB_ALIAS) -> bool:
+    connection = connections[alias]
+    if connection.vendor == "sqlite":
+        return False
+    if connection.in_atomic_block:
+        return False
+    return True
+
+
+def _close_thread_connections(func):
+    """
+    Run func then close any connections it opened; connections are per thread
+    so this only affects the worker, never the request thread.
+    """
+    try:
+        return func()
+    finally:
+        connections.close_all()
+
+
+def run_concurrently(main, *others):
+    """
+    Run main in the calling thread and each of others in a worker thread.
+    Returns a list of results in argument order. Exceptions are re-raised in the caller.
+    """
+    if not others:
+        return [main()]
+    with ThreadPoolExecutor(max_workers=len(others), thread_name_prefix="tableaux") as executor:
+        futures = [executor.submit(_close_thread_connections, func) for func in others]
+        result = main()
+        return [result] + [future.result() for future in futures]
+
+
+class ConcurrentPaginator(Paginator):
+    """
+    Paginator for table rows that issues the COUNT(*) and the LIMIT/OFFSET page fetch in parallel
+    on separate connections, so latency becomes max(count, page) rather than their sum.
+    Falls back to the standard sequential behaviour whenever that is not possible.
+    """
+
+    def _queryset(self):
+        # self.object_list is the table's BoundRows; its data wraps the queryset
+        return getattr(getattr(self.object_list, "data", None), "data", None)
+
+    def page(self, number):
+        if self.orphans or "count" in self.__dict__ or not can_run_concurrently(self._queryset()):
+            return super().page(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            return super().page(number)
+        if number < 1:
+            return super().page(number)
+
+        bottom = (number - 1) * self.per_page
+        rows = self.object_list[bottom : bottom + self.per_page]
+        # len() evaluates and caches the sliced queryset so rendering does not query again
+        _, count = run_concurrently(lambda: len(rows.data), lambda: len(self.object_list))
+        # Paginator.count is a cached_property; seed it so validation does not count again
+        self.__dict__["count"] = count
+        return self._get_page(rows, self.validate_number(number), self)
+
+
+def pack_pks(queryset, limit):
+    """
+    The pks of the ordered queryset as bytes of 64 bit integers, or None if the pks are not
+    integers or there are more than limit of them
+    """
+    pks = list(queryset.values_list("pk", flat=True)[: limit + 1])
+    if len(pks) > limit:
+        return None
+    try:
+        return array("q", pks).tobytes()
+    except (TypeError, OverflowError):
+        return None
+
+
+def unpack_pks(data) -> array:
+    pks = array("q")
+    pks.frombytes(data)
+    return pks
+
+
+class PinnedPaginator(Paginator):
+    """
+    Paginator over a pinned result set: an ordered array of pks computed once for the table state.
+    The count is the length of the array and a page is fetched with pk__in on its slice of pks,
+    so deep pages cost no more than the first and rows inserted meanwhile do not shift the pages.
+    """
+
+    def __init__(self, pks, per_page, queryset, table, **kwargs):
+        super().__init__(pks, per_page, **kwargs)
+        self.queryset = queryset
+        self.table = table
+
+    def rows(self, pks):
+        """
+        BoundRows for the records with these pks in the pinned order; deleted records are skipped
+        """
+        records = self.queryset.in_bulk(pks.tolist())
+        return BoundRows([records[pk] for pk in pks if pk in records], self.table)
+
+    def _get_page(self, object_list, number, paginator):
+        return Page(self.rows(object_list), number, paginator)
+
+
+class QueryTimeout(Exception):
+    """
+    A query ran longer than the budget of a query_timeout block
+    """
+
+    def __init__(self, ms, sql=""):
+        super().__init__(f"Query exceeded {ms}ms")
+        self.ms = ms
+        self.sql = sql
+
+
+# SQLSTATE query_canceled, raised when statement_timeout expires
+_PG_QUERY_CANCELED = "57014"
+
+
+@contextmanager
+def query_timeout(ms, using=DEFAULT_DB_ALIAS):
+    """
+    Interrupt any query on the connection that runs longer than ms milliseconds and raise
+    QueryTimeout. PostgreSQL uses a transaction-local statement_timeout, in a savepoint when a
+    transaction is open so that the cancelled query does not break it; SQLite uses a progress handler.
+    Other databases, or a falsy ms, run without a limit.
+    """
+    connection = connections[using]
+    if not ms or connection.vendor not in ("postgresql", "sqlite"):
+        yield
+        return
+    last = {"sql": ""}
+
+    def capture(execute, sql, params, many, context):
+        last["sql"] = sql
+        return execute(sql, params, many, context)
+
+    connection.ensure_connection()
+    if connection.vendor == "postgresql":
+        try:
+            # SET LOCAL keeps the limit inside this transaction, so it cannot leak to other requests
+            # through a pooled connection; inside an open transaction this is a savepoint
+            with transaction.atomic(using=using):
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT current_setting('statement_timeout')")
+                    previous = cursor.fetchone()[0]
+                    cursor.execute("SELECT set_config('statement_timeout', %s, true)", [str(int(ms))])
+                with connection.execute_wrapper(capture):
+                    yield
+                # A released savepoint keeps the setting until the outer transaction ends
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT set_config('statement_timeout', %s, true)", [previous])
+        except OperationalError as e:
+            cause = e.__cause__
+            if _PG_QUERY_CANCELED in (getattr(cause, "pgcode", None), getattr(cause, "sqlstate", None)):
+                raise QueryTimeout(ms, last["sql"]) from e
+            raise
+    else:
+        deadline = time.monotonic() + ms / 1000
+        tripped = []
+
+        def progress():
+            if time.monotonic() > deadline:
+                tripped.append(True)
+                return 1
+            return 0
+
+        connection.connection.set_progress_handler(progress, 10_000)
+        try:
+            with connection.execute_wrapper(capture):
+                yield
+        except OperationalError as e:
+            if tripped:
+                raise QueryTimeout(ms, last["sql"]) from e
+            raise
+        finally:
+            connection.connection.set_progress_handler(None, 0)
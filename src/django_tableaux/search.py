@@ -0,0 +1,204 @@
+"""
+Backends for the global search toolbar item.
+A backend filters a queryset to the rows that match every term of a search across TableauxView.search_fields.
+The indexed backends need the tableaux_search_index management command to build their index.
+"""
+
+import hashlib
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+
+def index_name(model, fields) -> str:
+    # One index per model and set of fields, so views searching different fields do not collide
+    digest = hashlib.md5(f"{model._meta.db_table}:{','.join(fields)}".encode()).hexdigest()[:8]
+    return f"tbx_search_{model._meta.db_table}_{digest}"[:63]
+
+
+def local_columns(model, fields) -> list:
+    """
+    Return the database column of each field; an index can only cover fields stored in the model's own table
+    """
+    columns = []
+    for name in fields:
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            field = None
+        if field is None or not field.concrete or field.is_relation:
+            raise ImproperlyConfigured(
+                f"Search field '{name}' of {model._meta.label} cannot be indexed; use the naive backend"
+            )
+        columns.append(field.column)
+    return columns
+
+
+class SearchBackend:
+    """
+    Subclass and set TableauxView.search_backend to the class to add a backend
+    """
+
+    def search(self, queryset, fields, query):
+        raise NotImplementedError
+
+    def index_exists(self, model, fields, using=DEFAULT_DB_ALIAS) -> bool:
+        return True
+
+    def build_index(self, model, fields, using=DEFAULT_DB_ALIAS) -> str:
+        """
+        Create the index, or refresh it if it exists. Returns a description of what was done.
+        """
+        return "no index needed"
+
+    def drop_index(self, model, fields, using=DEFAULT_DB_ALIAS) -> str:
+        return "no index to drop"
+
+
+class NaiveSearch(SearchBackend):
+    """
+    icontains on every field. Works everywhere, and with related fields, but scans the table.
+    """
+
+    def search(self, queryset, fields, query):
+        condition = Q()
+        for term in query.split():
+            condition &= reduce(or_, (Q(**{f"{field}__icontains": term}) for field in fields))
+        queryset = queryset.filter(condition)
+        # A term matching several related rows would repeat the record
+        return queryset.distinct() if any("__" in field for field in fields) else queryset
+
+
+class PostgresSearch(SearchBackend):
+    """
+    Full text search with a SearchVector over the fields, served by a GIN index on the same expression.
+    Every term of the search matches as a prefix, so results narrow as the user types.
+    """
+
+    config = "english"
+
+    def vector(self, fields):
+        # Imported here because django.contrib.postgres needs psycopg
+        from django.contrib.postgres.search import SearchVector
+
+        return SearchVector(*fields, config=self.config)
+
+    def search(self, queryset, fields, query):
+        from django.contrib.postgres.search import SearchQuery
+
+        terms = " & ".join("'{}':*".format(term.replace("'", "''").replace("\\", "\\\\")) for term in query.split())
+        if not terms:
+            return queryset
+        return queryset.annotate(tbx_search=self.vector(fields)).filter(
+            tbx_search=SearchQuery(terms, config=self.config, search_type="raw")
+        )
+
+    def index_exists(self, model, fields, using=DEFAULT_DB_ALIAS) -> bool:
+        connection = connections[using]
+        with connection.cursor() as cursor:
+            return index_name(model, fields) in connection.introspection.get_constraints(cursor, model._meta.db_table)
+
+    def build_index(self, model, fields, using=DEFAULT_DB_ALIAS) -> str:
+        from django.contrib.postgres.indexes import GinIndex
+
+        local_columns(model, fields)
+        name = index_name(model, fields)
+        if self.index_exists(model, fields, using):
+            # PostgreSQL keeps a GIN index up to date as rows change
+            return f"{name} is up to date"
+        with connections[using].schema_editor() as editor:
+            editor.add_index(model, GinIndex(self.vector(fields), name=name))
+        return f"created {name}"
+
+    def drop_index(self, model, fields, using=DEFAULT_DB_ALIAS) -> str:
+        name = index_name(model, fields)
+        if not self.index_exists(model, fields, using):
+            return f"{name} does not exist"
+        with connections[using].schema_editor() as editor:
+            editor.execute(f"DROP INDEX {editor.quote_name(name)}")
+        return f"dropped {name}"
+
+
+class SQLiteSearch(SearchBackend):
+    """
+    An FTS5 virtual table that indexes the fields, kept in step with the model's table by triggers.
+    Every term of the search matches as a prefix.
+    """
+
+    def search(self, queryset, fields, query):
+        match = " AND ".join('"{}"*'.format(term.replace('"', '""')) for term in query.split())
+        if not match:
+            return queryset
+        table = index_name(queryset.model, fields)
+        return queryset.filter(pk__in=RawSQL(f'SELECT rowid FROM "{table}" WHERE "{table}" MATCH %s', [match]))
+
+    def index_exists(self, model, fields, using=DEFAULT_DB_ALIAS) -> bool:
+        with connections[using].cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = %s", [index_name(model, fields)])
+            return cursor.fetchone() is not None
+
+    def build_index(self, model, fields, using=DEFAULT_DB_ALIAS) -> str:
+        columns = local_columns(model, fields)
+        table = index_name(model, fields)
+        source = model._meta.db_table
+        pk = model._meta.pk.column
+        created = not self.index_exists(model, fields, using)
+        names = ", ".join(f'"{column}"' for column in columns)
+        new = ", ".join(f'new."{column}"' for column in columns)
+        old = ", ".join(f'old."{column}"' for column in columns)
+        insert = f'INSERT INTO "{table}"(rowid, {names}) VALUES (new."{pk}", {new});'
+        delete = f'INSERT INTO "{table}"("{table}", rowid, {names}) VALUES (\'delete\', old."{pk}", {old});'
+        with connections[using].cursor() as cursor:
+            if created:
+                cursor.execute(
+                    f'CREATE VIRTUAL TABLE "{table}" USING fts5({names}, content="{source}", content_rowid="{pk}")'
+                )
+                cursor.execute(f'CREATE TRIGGER "{table}_ai" AFTER INSERT ON "{source}" BEGIN {insert} END')
+                cursor.execute(f'CREATE TRIGGER "{table}_ad" AFTER DELETE ON "{source}" BEGIN {delete} END')
+                cursor.execute(f'CREATE TRIGGER "{table}_au" AFTER UPDATE ON "{source}" BEGIN {delete} {insert} END')
+            cursor.execute(f'INSERT INTO "{table}"("{table}") VALUES (\'rebuild\')')
+        return f"created {table}" if created else f"rebuilt {table}"
+
+    def drop_index(self, model, fields, using=DEFAULT_DB_ALIAS) -> str:
+        table = index_name(model, fields)
+        if not self.index_exists(model, fields, using):
+            return f"{table} does not exist"
+        with connections[using].cursor() as cursor:
+            for suffix in ("ai", "ad", "au"):
+                cursor.execute(f'DROP TRIGGER IF EXISTS "{table}_{suffix}"')
+            cursor.execute(f'DROP TABLE "{table}"')
+        return f"dropped {table}"
+
+
+BACKENDS = {
+    "naive": NaiveSearch,
+    "postgres": PostgresSearch,
+    "sqlite": SQLiteSearch,
+}
+
+
+def get_search_backend(backend=None, model=None, fields=(), using=DEFAULT_DB_ALIAS) -> SearchBackend:
+    """
+    Return a backend instance for TableauxView.search_backend, which can be a name in BACKENDS,
+    a SearchBackend class or instance, or None to choose one for the database.
+    Without a name, SQLite uses FTS5 only once its index has been built.
+    """
+    if isinstance(backend, SearchBackend):
+        return backend
+    if isinstance(backend, type):
+        return backend()
+    if backend is not None:
+        try:
+            return BACKENDS[backend]()
+        except KeyError:
+            raise ImproperlyConfigured(f"Unknown search backend '{backend}'; choose from {', '.join(BACKENDS)}")
+    vendor = connections[using].vendor
+    if vendor == "postgresql":
+        return PostgresSearch()
+    if vendor == "sqlite" and model is not None and SQLiteSearch().index_exists(model, fields, using):
+        return SQLiteSearch()
+    return NaiveSearch()
@@ -90,6 +90,35 @@ let tableaux = (function () {
 
 window.addEventListener("load", tableaux.initTableaux);
 window.addEventListener("reloadTableaux", tableaux.reload);
+// A batch load swaps in several tableaux at once
+document.body.addEventListener("initTableaux", tableaux.initTableaux);
+// Number each table's requests so the server can skip work for ones that have been superseded
+const RequestSequence = (function () {
+    const page = Math.random().toString(36).slice(2);
+    const counters = new Map();
+    return {
+        next: prefix => {
+            const n = (counters.get(prefix) || 0) + 1;
+            counters.set(prefix, n);
+            return `${page}-${n}`;
+        }
+    };
+})();
+document.body.addEventListener("htmx:configRequest", e => {
+    const container = e.detail.elt.closest?.("[data-controller='tableaux']");
+    if (container) e.detail.headers["X-Tableaux-Seq"] = RequestSequence.next(container.dataset.prefix || "");
+});
+// Search results swap in a new toolbar; keep the live search box so that text typed
+// while the request was in flight, the caret and focus survive
+document.body.addEventListener("htmx:oobBeforeSwap", e => {
+    e.detail.fragment?.querySelectorAll?.(".tbx-search").forEach(input => {
+        const live = document.getElementById(input.id);
+        if (!live) return;
+        const focused = document.activeElement === live;
+        input.replaceWith(live);
+        if (focused) queueMicrotask(() => live.focus());
+    });
+});
 document.body.addEventListener("initTableauxId", e => {
     const id = e.detail?.id;
     if (!id) return;
@@ -114,6 +143,44 @@ document.addEventListener('click', (e) => {
 });
 
 
+// Builds table rows from the columnar JSON sent for views with json_rows = True.
+// The html is the same as tableaux_rows.html renders.
+const JsonRows = (function () {
+    const entities = {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#x27;"};
+    const escape = text => text.replace(/[&<>"']/g, c => entities[c]);
+
+    function render(data) {
+        const last = data.pks.length - 1;
+        const rows = data.pks.map((pk, r) => {
+            let tr = `<tr ${data.attrs[data.row_attrs[r]]} id="${data.prefix}_tr_${pk}"`;
+            if (data.offset !== null) tr += ` data-index="${data.offset + r}"`;
+            if (r === last && data.last) tr += ` ${data.last}`;
+            const cells = data.columns.map((name, c) => {
+                const td = Array.isArray(data.td[c]) ? data.td[c][r] : data.td[c];
+                const value = data.values[c][r];
+                return `<td ${td}>${data.html[c] ? value : escape(value)}</td>`;
+            });
+            return `${tr}>${cells.join("")}</tr>`;
+        });
+        return rows.join("") + data.tail;
+    }
+
+    return {render};
+})();
+
+window.htmx?.defineExtension("tableaux-json", {
+    onEvent: function (name, evt) {
+        if (name === "htmx:configRequest") {
+            evt.detail.headers["X-Tableaux-Format"] = "json";
+        }
+    },
+    transformResponse: function (text, xhr) {
+        const type = xhr.getResponseHeader("Content-Type") || "";
+        return type.startsWith("application/json") ? JsonRows.render(JSON.parse(text)) : text;
+    }
+});
+
+
 class TableController {
     constructor(container, prefix = "") {
         this.container = container;
@@ -124,6 +191,8 @@ class TableController {
         this.selCount = this.container.querySelector(".selected-count");
         this.lastChecked = null;
         this.breakpoint = BreakpointService.get();
+        // Windowed infinite scroll drops rows from the DOM, so selected ids are kept here
+        this.selectedIds = new Set();
 
         /* ---- bind handlers once ---- */
         this.onBreakpointChange = this.onBreakpointChange.bind(this);
@@ -132,6 +201,15 @@ class TableController {
         this.onSelectAll = this.selectAll.bind(this);
         this.onSelectAllPage = this.selectAllPage.bind(this);
         this.onBreakpointChange = this.onBreakpointChange.bind(this);
+        this.onPrefetchHover = this.prefetchHover.bind(this);
+        this.onColumnToggle = this.columnToggle.bind(this);
+        this.onColumnRequest = this.columnRequest.bind(this);
+        this.onPageHide = this.saveColumns.bind(this);
+        // client_columns: optional columns are all rendered and hidden by this style element
+        this.columnStyle = this.container.querySelector("style[id$='column_style']");
+        this.columnTimer = null;
+        this.onLocalSort = this.localSort.bind(this);
+        this.onLocalFilter = this.localFilter.bind(this);
 
         BreakpointService.subscribe(this.onBreakpointChange);
         this.syncBreakpointInput(this.breakpoint);
@@ -149,14 +227,30 @@ class TableController {
             }, 0);
         }
 
+        const windowSize = parseInt(this.table?.dataset.window || "0");
+        this.window = windowSize > 0 ? new RowWindow(this, windowSize) : null;
+
         this.bind();
         this.countChecked();
+        if (this.container.dataset.prefetch) this.prefetchIdle();
     }
 
     bind() {
         this.selAll?.addEventListener("click", this.onSelectAll);
         this.selAllPage?.addEventListener("click", this.onSelectAllPage);
         this.table?.addEventListener("click", this.onTableClick);
+        if (this.container.dataset.prefetch) {
+            this.container.addEventListener("mouseover", this.onPrefetchHover);
+        }
+        if (this.table?.dataset.local) {
+            this.table.tHead?.addEventListener("click", this.onLocalSort);
+            this.container.querySelector(".tbx-local-filter")?.addEventListener("input", this.onLocalFilter);
+        }
+        if (this.columnStyle) {
+            this.container.addEventListener("change", this.onColumnToggle);
+            this.container.addEventListener("htmx:configRequest", this.onColumnRequest);
+            window.addEventListener("pagehide", this.onPageHide);
+        }
         if (this.container.querySelector(".td_editing")) {
             document.addEventListener("keypress", this.onLoseFocus);
             this.hasKeypressListener = true;
@@ -189,6 +283,14 @@ class TableController {
         this.selAll?.removeEventListener("click", this.onSelectAll);
         this.selAllPage?.removeEventListener("click", this.onSelectAllPage);
         this.table?.removeEventListener("click", this.onTableClick);
+        this.container.removeEventListener("mouseover", this.onPrefetchHover);
+        this.table?.tHead?.removeEventListener("click", this.onLocalSort);
+        this.container.querySelector(".tbx-local-filter")?.removeEventListener("input", this.onLocalFilter);
+        this.container.removeEventListener("change", this.onColumnToggle);
+        this.container.removeEventListener("htmx:configRequest", this.onColumnRequest);
+        window.removeEventListener("pagehide", this.onPageHide);
+        this.saveColumns();
+        this.window?.destroy();
         /* Document listener */
         if (this.hasKeypressListener) {
             document.removeEventListener("keypress", this.onLoseFocus);
@@ -216,7 +318,7 @@ class TableController {
 
         this.container
             .querySelectorAll("input[name='select-checkbox']")
-            .forEach(box => box.checked = checked);
+            .forEach(box => box.checked = checked && !box.closest("tr")?.hidden);
 
         this.lastChecked = null;
         this.countChecked();
@@ -249,11 +351,17 @@ class TableController {
                 const selectedClass = this.container.getAttribute("selected");
                 if (el.checked) {
                     ids.push(el.value);
+                    this.selectedIds.add(el.value);
                     selectedClass && row.classList.add(selectedClass);
                 } else {
+                    this.selectedIds.delete(el.value);
                     selectedClass && row.classList.remove(selectedClass);
                 }
             });
+        if (this.window) {
+            // Include selected rows that have been scrolled out of the window
+            ids.splice(0, ids.length, ...this.selectedIds);
+        }
 
         const hidden = this.container.querySelector("input[name='selected_ids']");
         if (hidden) hidden.value = ids.toString();
@@ -264,12 +372,156 @@ class TableController {
         }
     }
 
+    restoreChecked(rows) {
+        rows.forEach(row => {
+            const box = row.querySelector("input[name='select-checkbox']");
+            if (box) box.checked = this.selectedIds.has(box.value);
+        });
+        this.countChecked();
+    }
+
+    /* ---------- client columns ---------- */
+
+    columnBoxes() {
+        return Array.from(this.container.querySelectorAll("input[data-column]"));
+    }
+
+    shownColumns() {
+        return this.columnBoxes().filter(box => box.checked).map(box => box.dataset.column).join(",");
+    }
+
+    columnToggle(e) {
+        if (!e.target.matches("input[data-column]")) return;
+        // Show or hide at once, then save all changes made in the next second in one request
+        const tableId = CSS.escape(this.table.id);
+        this.columnStyle.textContent = this.columnBoxes()
+            .filter(box => !box.checked)
+            .map(box => `#${tableId} .tbx-col-${box.dataset.column} { display: none; }`)
+            .join("\n");
+        clearTimeout(this.columnTimer);
+        this.columnTimer = setTimeout(() => this.saveColumns(), 1000);
+    }
+
+    columnRequest(e) {
+        // Any other request re-renders from saved settings, so unsaved changes go with it
+        if (!this.columnTimer) return;
+        clearTimeout(this.columnTimer);
+        this.columnTimer = null;
+        e.detail.parameters["_columns"] = this.shownColumns();
+    }
+
+    saveColumns() {
+        if (!this.columnTimer) return;
+        clearTimeout(this.columnTimer);
+        this.columnTimer = null;
+        const box = this.columnBoxes()[0];
+        const form = this.container.querySelector(".filter-form");
+        const params = new URLSearchParams(form ? new FormData(form) : undefined);
+        params.set("_columns", this.shownColumns());
+        // keepalive lets the request finish when the page is being unloaded
+        fetch(`${box.dataset.url}?${params}`, {
+            keepalive: true,
+            headers: {"HX-Request": "true", "HX-Trigger": `${this.prefix}~cols~`, "HX-Current-URL": window.location.href}
+        });
+    }
+
+    /* ---------- local sort and filter ---------- */
+
+    dataRows() {
+        return Array.from(this.table.tBodies[0].querySelectorAll("tr[id*='_tr_']"));
+    }
+
+    localSort(e) {
+        // Sort the rendered rows by the data-sort keys of the clicked column
+        const th = e.target.closest("th[data-sort-column]");
+        if (!th) return;
+        const direction = th.getAttribute("aria-sort") === "ascending" ? "descending" : "ascending";
+        const icons = document.getElementById(`${this.prefix}sort_icons`)?.content;
+        const setIcon = (el, name) => {
+            const icon = icons?.querySelector(`[data-icon='${name}']`);
+            if (icon) el.querySelector(".tbx-sort-icon")?.replaceChildren(icon.cloneNode(true));
+        };
+        this.table.querySelectorAll("th[data-sort-column]").forEach(el => {
+            if (el === th) return;
+            el.removeAttribute("aria-sort");
+            setIcon(el, "none");
+        });
+        th.setAttribute("aria-sort", direction);
+        setIcon(th, direction);
+
+        const index = Array.from(th.parentElement.children).indexOf(th);
+        const rows = this.dataRows();
+        const keys = rows.map(row => row.children[index]?.dataset.sort ?? "");
+        const numeric = keys.every(key => key === "" || isFinite(key));
+        const compare = (a, b) => {
+            if (a === b) return 0;
+            if (a === "") return -1;
+            if (b === "") return 1;
+            return numeric ? Number(a) - Number(b) : a.localeCompare(b, undefined, {numeric: true});
+        };
+        const sign = direction === "ascending" ? 1 : -1;
+        const order = rows.map((row, i) => i).sort((a, b) => sign * compare(keys[a], keys[b]));
+        // Spacer and end rows stay after the data rows
+        const next = rows[rows.length - 1]?.nextSibling;
+        order.forEach(i => this.table.tBodies[0].insertBefore(rows[i], next));
+
+        // Keep the order if a later request renders the table on the server
+        const orderBy = this.container.querySelector("input[name='~order_by']");
+        if (orderBy) orderBy.value = `${sign < 0 ? "-" : ""}${th.dataset.sortColumn}`;
+    }
+
+    localFilter(e) {
+        const text = e.target.value.trim().toLowerCase();
+        this.dataRows().forEach(row => {
+            row.hidden = text !== "" && !row.textContent.toLowerCase().includes(text);
+        });
+    }
+
+    /* ---------- prefetch ---------- */
+
+    prefetchIdle() {
+        // Warm the server cache with the next page, or the next batch of rows for infinite/load more
+        const next = this.container.querySelector("li.next [id*='~page~']")
+            || this.container.querySelector("tr[hx-vals*='_scroll']");
+        if (!next) return;
+        const idle = window.requestIdleCallback || (cb => setTimeout(cb, 200));
+        idle(() => this.prefetch(next));
+    }
+
+    prefetchHover(e) {
+        const link = e.target.closest("[id*='~page~']");
+        if (link) this.prefetch(link);
+    }
+
+    prefetch(el) {
+        // A plain fetch so no indicator is shown and nothing is swapped; the server replies 204
+        if (!el || el.dataset.prefetched) return;
+        el.dataset.prefetched = "true";
+        const form = this.container.querySelector(".filter-form");
+        const params = new URLSearchParams(form ? new FormData(form) : undefined);
+        const vals = el.getAttribute("hx-vals");
+        if (vals) Object.entries(JSON.parse(vals)).forEach(([k, v]) => params.set(k, v));
+        params.set("_prefetch", "true");
+        fetch(`${el.getAttribute("hx-get")}?${params}`, {
+            headers: {"HX-Request": "true", "HX-Trigger": el.id, "HX-Current-URL": window.location.href}
+        });
+    }
+
     /* ---------- table click ---------- */
 
     tableClick(e) {
         const target = e.target;
         if (target.closest('th')) return;
 
+        const groupHeader = target.closest(".tbx-group-header");
+        if (groupHeader) {
+            // htmx loads the rows on the first click; after that the rows are shown or hidden here
+            const expanded = groupHeader.getAttribute("aria-expanded") === "true";
+            groupHeader.setAttribute("aria-expanded", String(!expanded));
+            groupHeader.closest("tbody").nextElementSibling.hidden = expanded;
+            return;
+        }
+
         const row = target.closest("tr");
         if (!row) return;
 
@@ -357,3 +609,105 @@ class TableController {
     }
 }
 
+
+class RowWindow {
+    /*
+     * Keeps at most `size` rows of an infinite scroll table in the DOM.
+     * Rows that leave the window are replaced by spacer rows whose height preserves the scroll
+     * position. When a spacer comes into view its range is fetched back from the server.
+     */
+    constructor(controller, size) {
+        this.controller = controller;
+        this.size = size;
+        this.chunk = parseInt(controller.table.dataset.chunk || "20");
+        this.tbody = controller.table.tBodies[0];
+        this.top = this.tbody.querySelector(".tbx-spacer-top");
+        this.bottom = this.tbody.querySelector(".tbx-spacer-bottom");
+        this.loading = false;
+        // Rows above the first rendered page (e.g. after a reload on page 5) get an estimated height
+        const rows = this.rows();
+        const estimate = rows.length ? controller.table.tBodies[0].offsetHeight / rows.length : 0;
+        if (this.top) this.resize(this.top, this.span(this.top) * estimate);
+        this.observer = new IntersectionObserver(this.onIntersect.bind(this), {rootMargin: "200px"});
+        [this.top, this.bottom].forEach(spacer => spacer && this.observer.observe(spacer));
+    }
+
+    destroy() {
+        this.observer.disconnect();
+    }
+
+    rows() {
+        return Array.from(this.tbody.querySelectorAll("tr[data-index]"));
+    }
+
+    span(spacer) {
+        return parseInt(spacer.dataset.end) - parseInt(spacer.dataset.start);
+    }
+
+    resize(spacer, delta) {
+        const height = this.span(spacer) > 0 ? Math.max(0, (parseFloat(spacer.dataset.height) || 0) + delta) : 0;
+        spacer.dataset.height = height.toString();
+        spacer.firstElementChild.style.height = `${height}px`;
+    }
+
+    onIntersect(entries) {
+        if (this.loading) return;
+        const entry = entries.find(e => e.isIntersecting && this.span(e.target) > 0);
+        if (!entry) return;
+        const spacer = entry.target;
+        const start = parseInt(spacer.dataset.start);
+        const end = parseInt(spacer.dataset.end);
+        if (spacer === this.top) {
+            this.load(spacer, Math.max(start, end - this.chunk), end, "afterend");
+        } else {
+            this.load(spacer, start, Math.min(end, start + this.chunk), "beforebegin");
+        }
+    }
+
+    load(spacer, start, end, swap) {
+        this.loading = true;
+        window.htmx.ajax("GET", this.controller.container.dataset.url, {
+            source: spacer,
+            target: spacer,
+            swap: swap,
+            values: {_range: `${start}-${end}`}
+        }).then(() => {
+            const added = this.rows().filter(row => {
+                const index = parseInt(row.dataset.index);
+                return index >= start && index < end;
+            });
+            const height = added.reduce((sum, row) => sum + row.offsetHeight, 0);
+            if (spacer === this.top) {
+                spacer.dataset.end = start.toString();
+            } else {
+                spacer.dataset.start = end.toString();
+            }
+            this.resize(spacer, -height);
+            this.trim(spacer === this.top ? this.bottom : this.top);
+            this.controller.restoreChecked(added);
+        }).finally(() => {
+            this.loading = false;
+            // Re-observing reports the spacer again if it is still in view
+            this.observer.unobserve(spacer);
+            this.observer.observe(spacer);
+        });
+    }
+
+    trim(spacer) {
+        // Drop rows beyond the window from the side opposite to the one just loaded
+        if (!spacer) return;
+        const rows = this.rows();
+        const excess = rows.length - this.size;
+        if (excess <= 0) return;
+        const removed = spacer === this.top ? rows.slice(0, excess) : rows.slice(rows.length - excess);
+        const height = removed.reduce((sum, row) => sum + row.offsetHeight, 0);
+        removed.forEach(row => row.remove());
+        const remaining = this.rows();
+        if (spacer === this.top) {
+            spacer.dataset.end = remaining[0].dataset.index;
+        } else {
+            spacer.dataset.start = (parseInt(remaining[remaining.length - 1].dataset.index) + 1).toString();
+        }
+        this.resize(spacer, height);
+    }
+}
@@ -1,15 +1,23 @@
+from functools import partial
+
 from django.core.exceptions import ImproperlyConfigured
-from django.core.paginator import EmptyPage, PageNotAnInteger
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db.models import QuerySet
 from django.shortcuts import reverse
 from django.urls.resolvers import NoReverseMatch
 from django_tableaux.utils import merge_attrs
 
+from .aggregates import column_path, footer_functions, format_aggregate
+from .grouping import group_queryset, make_groups
 from .models import Pagination, FilterStyle
+from .queries import ConcurrentPaginator, PinnedPaginator
 from .utils import (
+    default_columns_dict,
     define_columns,
     set_select_column,
     set_column_states,
     load_columns_dict,
+    page_offset,
 )
 
 
@@ -29,14 +37,55 @@ def build_table(view, **kwargs):
     if order_by:
         table.order_by = order_by
 
+    # Grouping needs the database to compute the groups
+    table.group_by = view.get_group_column() if isinstance(view.object_list, QuerySet) else None
+    functions = footer_functions(table)
+
     # Pagination
-    if view.pagination != Pagination.NONE:
+    table.row_offset = 0
+    table.row_range = view.row_range
+    table.groups = []
+    pinnable = view.pagination != Pagination.NONE and not table.group_by and view.group_filter is None
+    pks = view.get_pinned_pks(table) if pinnable else None
+    if view.row_range:
+        # An explicit slice of rows, requested when scrolling back through a windowed table
+        start, end = view.row_range
+        if pks is not None:
+            table.paginator = PinnedPaginator(pks, end - start, view.object_list, table)
+            table.page = Page(table.paginator.rows(pks[start:end]), 1, table.paginator)
+        else:
+            table.paginator = Paginator(table.rows, end - start)
+            table.page = Page(table.rows[start:end], 1, table.paginator)
+        table.row_offset = start
+    elif table.group_by:
+        # Groups rather than rows are paginated
+        groups = group_queryset(view.object_list, column_path(table, table.group_by), table, functions)
+        if view.pagination != Pagination.PAGED:
+            # Only the paginator pages through groups; load more and infinite scroll have no sentinel for them
+            groups = list(groups)
+            table.paginator = Paginator(groups, max(len(groups), 1))
+        else:
+            table.paginator = Paginator(groups, view.query_dict.get("~per_page", view.per_page))
+        page = 1 if view._order_by_changed or view._filter_changed else view.query_dict.get("~page", 1)
+        table.page = table.paginator.get_page(page)
+    elif pks is not None and view.pagination != Pagination.NONE:
+        # Pages of a pinned result set are looked up by pk
+        per_page = view.query_dict.get("~per_page", view.per_page)
+        table.paginator = PinnedPaginator(pks, per_page, view.object_list, table)
+        page = 1 if view._order_by_changed or view._filter_changed else view.query_dict.get("~page", 1)
+        table.page = table.paginator.get_page(page)
+        table.row_offset = page_offset(table.page)
+    elif view.pagination != Pagination.NONE:
         kwargs = {
             "per_page": view.query_dict.get("~per_page", view.per_page),
             "page": view.query_dict.get("~page", 1),
         }
         if hasattr(view, "paginator_class"):
             kwargs["paginator_class"] = view.paginator_class
+        elif view.concurrent_queries and not view.query_timeout_ms:
+            # COUNT(*) and the page fetch run in parallel; falls back to sequential where unsafe.
+            # query_timeout_ms only limits the request's own connection, so the worker's count is never run
+            kwargs["paginator_class"] = ConcurrentPaginator
         # Changing sort order or filtering resets page to 1
         if view._order_by_changed or view._filter_changed:
             kwargs["page"] = 1
@@ -51,12 +100,14 @@ def build_table(view, **kwargs):
                 table.page = table.paginator.page(1)
             except EmptyPage:
                 table.page = table.paginator.page(table.paginator.num_pages)
+        table.row_offset = page_offset(table.page)
 
     # This adds dynamic attributes to the table instance
     table.prefix = view.prefix
     table.indicator = view.indicator
 
     table.sticky_header = view.sticky_header
+    table.window_rows = view.window_rows if view.pagination == Pagination.INFINITE and not table.group_by else 0
     # variables that control action when table is clicked
     table.url = ""
     table.pk = False
@@ -91,23 +142,59 @@ def build_table(view, **kwargs):
     # define possible columns depending upon the current breakpoint
     define_columns(table, view.get_breakpoint_values(), view._bp)
 
-    # Detect breakpoint change; if the bp has changed and the new one has no saved
-    # settings, seed it from the previous bp's settings rather than defaulting.
-    prev_bp_key = f"tbx:prev_bp:{table.__class__.__name__}"
-    prev_bp = view.request.session.get(prev_bp_key)
-    view.request.session[prev_bp_key] = view._bp
-    if prev_bp and prev_bp != view._bp:
-        current_dict = load_columns_dict(view.request, table, prev_bp)
+    if view.public_cache_seconds:
+        # Public tables show the default columns and never touch the session
+        columns_dict = default_columns_dict(table)
     else:
-        current_dict = None
+        # Detect breakpoint change; if the bp has changed and the new one has no saved
+        # settings, seed it from the previous bp's settings rather than defaulting.
+        prev_bp_key = f"tbx:prev_bp:{table.__class__.__name__}"
+        prev_bp = view.request.session.get(prev_bp_key)
+        if prev_bp != view._bp:
+            # Assigning marks the session modified, so it is only done on a change
+            view.request.session[prev_bp_key] = view._bp
+        if prev_bp and prev_bp != view._bp:
+            current_dict = load_columns_dict(view.request, table, prev_bp)
+        else:
+            current_dict = None
 
-    # set visible columns according to saved setting
-    columns_dict = load_columns_dict(
-        view.request, table, view._bp, current_dict=current_dict
-    )
+        # set visible columns according to saved setting
+        columns_dict = load_columns_dict(
+            view.request, table, view._bp, current_dict=current_dict
+        )
     table.columns_visible = [col for col in columns_dict if columns_dict[col]]
     set_column_states(table)
 
+    # With client columns every optional column is rendered and the hidden ones are hidden by a
+    # style rule, so the browser can show or hide them without a request
+    table.client_columns = view.client_columns and not table.mobile
+    table.columns_hidden = []
+    if table.client_columns:
+        table.columns_hidden = [col for col in table.columns_optional if col not in table.columns_visible]
+        table.columns_visible = [col for col in columns_dict if columns_dict[col] or col in table.columns_hidden]
+        get_column_class_names = table.get_column_class_names
+        table.get_column_class_names = lambda classes, bound_column: get_column_class_names(
+            classes, bound_column
+        ) | {f"tbx-col-{bound_column.name}"}
+
+    # Footer aggregates are computed over all the filtered rows, only if the footer is rendered
+    for name, function in functions.items():
+        # tables2 has no public way to set a footer on a bound table; columns are copied per table
+        table.columns[name].column._footer = partial(_footer_cell, view, functions, function)
+
+    if table.group_by and not view.row_range:
+        path = column_path(table, table.group_by)
+        table.groups = make_groups(table.page.object_list, view.object_list.model, path, table, functions)
+
+    # Small unpaginated tables are sorted and filtered in the browser
+    table.local = bool(
+        not table.group_by
+        and view.local_rows_threshold
+        and view.pagination == Pagination.NONE
+        and not table.mobile
+        and len(table.rows) <= view.local_rows_threshold
+    )
+
     # If filter is in header, build list of filters in same sequence as columns
     if view.filter_style == FilterStyle.HEADER:
         table.header_fields = []
@@ -123,3 +210,8 @@ def build_table(view, **kwargs):
         else:
             table.attrs["thead"]["class"] += " sticky"
     return table
+
+
+def _footer_cell(view, functions, function, bound_column, table):
+    value = view.get_footer_aggregates(table, functions)[bound_column.name]
+    return format_aggregate(function, value, bound_column, table)
@@ -1,7 +1,14 @@
+from datetime import date, time
+from decimal import Decimal
+
 from django import template
+from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured
 from django.utils.safestring import mark_safe
 from django.urls import reverse, NoReverseMatch
+from django_tables2 import A
+
+from ..columns import row_cells
 
 register = template.Library()
 
@@ -46,6 +53,60 @@ def tableaux(context, url_name="", prefix=""):
     return mark_safe(code)
 
 
+@register.simple_tag(takes_context=True)
+def tableaux_batch(context, *tables, url_name="tableaux_batch"):
+    """
+    Load several tableaux with one request to TableauxBatchView.
+    Each positional argument is "url_name" or "url_name|prefix", e.g.
+    {% tableaux_batch "orders|o_" "invoices|i_" %}
+    """
+    specs = []
+    code = ""
+    for spec in tables:
+        table_url_name, _, prefix = spec.partition("|")
+        try:
+            reverse(table_url_name)
+        except NoReverseMatch:
+            raise ImproperlyConfigured(f"Tableaux: {table_url_name} is not a valid url name")
+        specs.append(f"{table_url_name}|{prefix}")
+        # Placeholders replaced by the out-of-band swaps in the batch response
+        code += f'<div id="{prefix}tableaux_wrapper"></div>'
+        code += f'<div class="htmx-indicator" id="{prefix}tableaux_overlay"></div>'
+    try:
+        url = reverse(url_name)
+    except NoReverseMatch:
+        raise ImproperlyConfigured(f"Tableaux: {url_name} is not a valid url name for TableauxBatchView")
+    query_string = context.request.GET.urlencode()
+    hx_vals = (
+        f"js:{{ 'bp': BreakpointService.get(), 'tables': '{','.join(specs)}', 'query_string': '{query_string}' }}"
+    )
+    code += (
+        f'<div id="tableaux_batch_load" hx-trigger="load" hx-get="{url}" hx-vals="{hx_vals}"'
+        f' hx-swap="outerHTML" hx-target="this"></div>'
+    )
+    return mark_safe(code)
+
+
+@register.simple_tag(takes_context=True)
+def toolbar_main(context):
+    """
+    Render the main toolbar, from the cache when the view sets toolbar_cache_seconds
+    """
+    view = context["view"]
+    key = view.get_toolbar_cache_key()
+    html = cache.get(key) if key else None
+    if html is None:
+        html = context.template.engine.get_template(context["templates"]["toolbar_main"]).render(context)
+        if key:
+            cache.set(key, html, view.toolbar_cache_seconds)
+    return mark_safe(html)
+
+
+@register.filter
+def cells(row):
+    return row_cells(row)
+
+
 @register.filter
 def render_button(button):
     return button.render()
@@ -69,6 +130,25 @@ def td_attr(column, table):
     return html
 
 
+@register.filter
+def sort_key(record, column):
+    """
+    Key used to sort a cell in the browser: the value the column is ordered by, with numbers
+    written plainly so they compare numerically and dates in ISO format so they compare as text
+    """
+    value = A(column.order_by[0].bare).resolve(record, quiet=True) if column.order_by else None
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, (int, float, Decimal)):
+        # str() rather than the template's localized output, so the browser can parse it
+        return str(value)
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    return str(value)
+
+
 @register.filter
 def has_filter_toolbar(view):
     return view.filterset is not None and view.filterstyle == view.filterstyle.TOOLBAR
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Union
 
@@ -53,25 +54,24 @@ def load_columns_dict(
                 table_name=table.__class__.__name__,
                 breakpoint=bp,
             )
-            stored_dict = row.visible_columns
+            saved_dict = row.visible_columns
         except UserTableSettings.DoesNotExist:
-            stored_dict = (
-                current_dict
-                if current_dict is not None
-                else default_columns_dict(table)
-            )
+            saved_dict = None
     else:
-        stored_dict = request.session.get(_session_key(request, table, bp))
-        if stored_dict is None:
-            stored_dict = (
-                current_dict
-                if current_dict is not None
-                else default_columns_dict(table)
-            )
+        saved_dict = request.session.get(_session_key(request, table, bp))
+    if saved_dict is not None:
+        stored_dict = saved_dict
+    elif current_dict is not None:
+        stored_dict = current_dict
+    else:
+        stored_dict = default_columns_dict(table)
 
     # Sync with the table's current sequence: new columns default to False.
     columns_dict = {col: stored_dict.get(col, False) for col in table.sequence}
-    save_columns_dict(request, table, bp, columns_dict)
+    # Write only a change, so that rendering a table does not update the session or settings row.
+    # Unsaved defaults are recomputed each time.
+    if columns_dict != saved_dict and (saved_dict is not None or current_dict is not None):
+        save_columns_dict(request, table, bp, columns_dict)
     return columns_dict
 
 
@@ -92,21 +92,40 @@ def default_columns_dict(table: Table) -> dict[str, bool]:
 def set_column(
     request: HttpRequest, table: Table, bp: str, column_name: str, checked: bool
 ) -> list:
+    set_columns(request, table, bp, {column_name: checked})
+
+
+def set_columns(
+    request: HttpRequest, table: Table, bp: str, changes: dict[str, bool]
+):
+    """
+    Apply several visibility changes with a single settings read and write
+    """
     column_dict = load_columns_dict(request, table, bp)
-    column_dict[column_name] = checked
+    column_dict.update(changes)
     save_columns_dict(request, table, bp, column_dict)
 
 
 def visible_columns(
-    request: HttpRequest, table_class, bp_dict: dict[str, int], bp: str
+    request: HttpRequest,
+    table_class,
+    bp_dict: dict[str, int],
+    bp: str,
+    include_optional: bool = False,
 ) -> list[str]:
     """
     Return the list of visible column names in correct sequence
+    With include_optional, hidden optional columns are included too; they are in the
+    DOM when the view uses client_columns.
     """
     table = table_class(data=[])  # Create a dummy table to inspect its properties
     define_columns(table, bp_dict, bp)  # Configure columns based on breakpoint
     columns_dict = load_columns_dict(request, table, bp)
-    return [col for col, is_visible in columns_dict.items() if is_visible]
+    return [
+        col
+        for col, is_visible in columns_dict.items()
+        if is_visible or (include_optional and col in table.columns_optional)
+    ]
 
 
 def set_select_column(table):
@@ -350,7 +369,15 @@ def get_template_path(template_name: str) -> str:
 def build_templates_dictionary(library=None):
     """
     Returns a dictionary with key=template name (without .html) and value=full template path
+    Outside DEBUG the result is cached so each request does not glob the template directories.
     """
+    library = library or get_template_library()
+    if settings.DEBUG:
+        return _templates_dictionary(library)
+    return dict(_cached_templates_dictionary(library))
+
+
+def _templates_dictionary(library):
     default_path, custom_path = template_paths(library=library)
     # Load default templates, then overwrite with any custom templates
     result = {p.stem: str(p) for p in default_path.glob("*.html")}
@@ -360,6 +387,9 @@ def build_templates_dictionary(library=None):
     return result
 
 
+_cached_templates_dictionary = lru_cache(maxsize=None)(_templates_dictionary)
+
+
 def render_editable_link(
     record=None, column=None, value=None, url="", template_name=None
 ):
@@ -391,6 +421,14 @@ def render_editable_form(
     return render(request, template_name, context)
 
 
+def page_offset(page) -> int:
+    """
+    The number of rows before the page. Unlike Page.start_index() it does not need the
+    paginator's count, which django-tables2's LazyPaginator does not provide.
+    """
+    return (page.number - 1) * page.paginator.per_page
+
+
 def strip_prefix_from_keys(data: dict, prefix: str) -> dict:
     plen = len(prefix)
     return {
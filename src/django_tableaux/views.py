@@ -1,14 +1,25 @@
+import copy
+import hashlib
+import json
 import logging
+import time
+from functools import partial
 from typing import Any
 from urllib.parse import urlsplit, urlunsplit, parse_qs
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured
-from django.http import QueryDict, HttpResponse
+from django.db import connections
+from django.db.models import QuerySet
+from django.http import QueryDict, HttpResponse, HttpResponseBadRequest, JsonResponse
 from django.shortcuts import render
 from django.template.response import TemplateResponse
+from django.urls import NoReverseMatch, reverse, resolve
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.functional import SimpleLazyObject
 from django.utils.http import urlencode
-from django.views.generic import TemplateView
+from django.views.generic import TemplateView, View
 from django_filters.filterset import filterset_factory
 from django_htmx.http import (
     HttpResponseClientRefresh,
@@ -19,21 +30,48 @@ from django_htmx.http import (
     replace_url,
     reswap,
 )
+from django_htmx.middleware import HtmxDetails
 import django_tables2 as tables
 from django_tables2.export.export import TableExport
 
+from django_tableaux.aggregates import column_path, compute_aggregates
+from django_tableaux.facets import count_facets, facet_filters, label_choices
 from django_tableaux.get_htmx import get_htmx
+from django_tableaux.grouping import group_filter
+from django_tableaux.instrumentation import record_event, stage
+from django_tableaux.json_rows import rows_json
 from django_tableaux.models import Pagination, FilterStyle, ClickAction
+from django_tableaux.queries import (
+    QueryTimeout,
+    connection_allows_concurrency,
+    pack_pks,
+    query_timeout,
+    run_concurrently,
+    unpack_pks,
+)
+from django_tableaux.search import get_search_backend
 from django_tableaux.table import build_table
 from .utils import (
     breakpoints,
     visible_columns,
     build_templates_dictionary,
+    get_template_library,
     strip_prefix_from_keys,
 )
 
 logger = logging.getLogger(__name__)
 
+# Session key holding the time of the session's last write through a tableaux
+WRITE_TIME_KEY = "tbx:last_write"
+
+
+def _canonical(value):
+    # A single value as a string and several as a sorted list of strings
+    if isinstance(value, (list, tuple)):
+        values = sorted(str(v) for v in value if v not in ("", None))
+        return values[0] if len(values) == 1 else values or ""
+    return "" if value is None else str(value)
+
 
 class TableauxView(TemplateView):
     title = ""
@@ -54,12 +92,34 @@ class TableauxView(TemplateView):
     filter_button = False
     filter_clear_button = True
     filter_clear_field = True
+    search_fields = []
+    search_backend = None
+    facet_counts = False
+    facet_seconds = 60
+    footer_seconds = 60
+    group_columns = []
+    group_rows = 100
+    pin_results = False
+    pin_seconds = 300
+    pin_max_rows = 100_000
+    read_db_alias = None
+    read_your_writes_seconds = 0
+    query_timeout_ms = 0
+    query_timeout_message = "This table took too long to load. Try narrowing the filters or search."
     #
     pagination = Pagination.PAGED
     per_page = 20
+    window_rows = 0
+    concurrent_queries = False
+    prefetch_pages = False
+    prefetch_seconds = 30
+    local_rows_threshold = 0
+    json_rows = False
+    drop_superseded = True
     #
     columns_control = False
     column_reset = True
+    client_columns = False
     rows_control = False
     toolbar = {
         "left": "actions",
@@ -72,6 +132,8 @@ class TableauxView(TemplateView):
         "left": "record_count",
         "center": "paginator",
     }
+    toolbar_cache_seconds = 0
+    public_cache_seconds = 0
 
     click_action = ClickAction.NONE
     click_url_name = ""
@@ -97,6 +159,15 @@ class TableauxView(TemplateView):
     responsive_settings = {}
 
     LOCAL_PARAMS = ["page", "per_page", "order_by"]
+    STATE_DEFAULTS = {"~order_by": "", "~search": "", "~group": ""}
+    # Regions of the tableaux re-rendered for each kind of change; see render_fragments
+    fragment_plans = {
+        "sort": ("page_wrapper", "state"),
+        "page": ("page_wrapper", "state"),
+        "search": ("page_wrapper", "state"),
+    }
+    # Toolbar items whose content depends on the current page or sort order
+    PAGE_DEPENDENT_ITEMS = ("paginator", "record_count")
 
     def _apply_responsive_settings(self):
         if not self.responsive_settings or not self._bp:
@@ -145,6 +216,12 @@ class TableauxView(TemplateView):
         self._order_by_changed = False
         self._filter_changed = False
         self._bp = ""
+        self.batch_load = False
+        self.row_range = None
+        self._request_seq = None
+        self._footer_aggregates = None
+        self.group_filter = None
+        self.query_timeout = None
 
     def setup(self, request, *args, **kwargs):
         """
@@ -170,7 +247,61 @@ class TableauxView(TemplateView):
         print(self.template_library)
 
     def dispatch(self, request, *args, **kwargs):
-        return super().dispatch(request, *args, **kwargs)
+        if not (self.query_timeout_ms and request.method in ("GET", "HEAD") and self.table_data is None):
+            response = super().dispatch(request, *args, **kwargs)
+        else:
+            try:
+                with query_timeout(self.query_timeout_ms, self.get_read_db() or self.get_queryset().db):
+                    response = super().dispatch(request, *args, **kwargs)
+                    # Template responses run their queries as they render, so render inside the guard
+                    if hasattr(response, "render") and not response.is_rendered:
+                        response.render()
+            except QueryTimeout as e:
+                record_event("query_timeout", view=type(self).__qualname__, ms=e.ms, sql=e.sql)
+                logger.warning("%s query exceeded %sms: %s", type(self).__qualname__, e.ms, e.sql)
+                return self.render_query_timeout(e)
+        if self.public_cache_seconds and request.method in ("GET", "HEAD") and response.status_code == 200:
+            # A response that read the session, such as an export of the selected rows, is private.
+            # Templates can read it too, through user or messages, so render before looking.
+            if hasattr(response, "render") and not response.is_rendered:
+                response.render()
+            session = getattr(request, "session", None)
+            if session is None or not session.accessed:
+                self.patch_public_cache(response)
+        return response
+
+    def render_query_timeout(self, exc):
+        """
+        The response when the table's queries exceed query_timeout_ms: query_timeout_message in an
+        alert. An htmx request that updates a table already on the page gets just the alert, swapped
+        into the page wrapper; a full page or first load gets the table's toolbars with the alert in
+        place of the rows, so that the filters can be narrowed.
+        """
+        self.query_timeout = exc
+        if self.request.htmx and self.request.htmx.trigger_name != "table_load":
+            response = render(
+                self.request,
+                self.templates["alert"],
+                {"alert_class": "alert-warning", "message": self.query_timeout_message},
+            )
+            response = retarget(response, f"#{self.prefix}page_wrapper")
+            return reswap(response, "innerHTML")
+        response = self.get(self.request, *self.args, **self.kwargs)
+        if hasattr(response, "render") and not response.is_rendered:
+            response.render()
+        return response
+
+    # Request headers that select what a tableaux GET returns, besides the url. The return url and
+    # the url pushed to the browser's history are built from HX-Current-URL.
+    PUBLIC_VARY = ("HX-Request", "HX-Target", "HX-Trigger", "HX-Trigger-Name", "HX-Current-URL", "X-Tableaux-Format")
+
+    def patch_public_cache(self, response):
+        """
+        Let shared caches store the response: every part of the table state is in the url, and
+        responses differ otherwise only by the htmx headers named in Vary
+        """
+        patch_cache_control(response, public=True, max_age=self.public_cache_seconds)
+        patch_vary_headers(response, self.PUBLIC_VARY)
 
     def get(self, request, *args, **kwargs):
         if request.htmx:
@@ -214,6 +345,7 @@ class TableauxView(TemplateView):
                             break
 
             self.prefix = self.query_dict.pop("prefix", "")
+            self.register_request_seq()
             return get_htmx(self, request, *args, **kwargs)
         else:
             self.prefix = request.GET.get("prefix", self.prefix)
@@ -265,13 +397,212 @@ class TableauxView(TemplateView):
             )
 
     def get_filtered_object_list(self):
-        self.object_list = self.table_data if self.table_data is not None else self.get_queryset()
+        if self.table_data is not None:
+            self.object_list = self.table_data
+        else:
+            self.object_list = self.get_queryset()
+            read_db = self.get_read_db()
+            if read_db and isinstance(self.object_list, QuerySet):
+                self.object_list = self.object_list.using(read_db)
         self.filterset = self.get_filterset(self.object_list)
         if self.filterset is not None:
             self.object_list = self.filterset.qs
+        self.object_list = self.search_object_list(self.object_list)
         self.object_list = self.process_filtered_object_list()
+        if self.group_filter is not None:
+            self.object_list = self.object_list.filter(**self.group_filter)
+        if self.query_timeout is not None and isinstance(self.object_list, QuerySet):
+            # Render the table around the timeout alert without running the slow queries again
+            self.object_list = self.object_list.none()
         return self.object_list
 
+    def get_read_db(self):
+        """
+        The database the rows are read from: read_db_alias for GET requests, unless this session
+        wrote within read_your_writes_seconds. None reads from the queryset's own database.
+        """
+        if not self.read_db_alias or self.request.method not in ("GET", "HEAD"):
+            return None
+        if self.read_your_writes_seconds and not self.public_cache_seconds:
+            written = self.request.session.get(WRITE_TIME_KEY)
+            if written and time.time() - written < self.read_your_writes_seconds:
+                return None
+        return self.read_db_alias
+
+    def record_write(self):
+        """
+        Note that this session changed data, so that its reads stay on the primary database for
+        read_your_writes_seconds. Call it from handlers that write outside post() and cell_changed().
+        """
+        if self.read_db_alias and self.read_your_writes_seconds:
+            self.request.session[WRITE_TIME_KEY] = time.time()
+
+    def search_object_list(self, object_list):
+        query = self.query_dict.get("~search", "").strip()
+        if not (query and self.search_fields and isinstance(object_list, QuerySet)):
+            return object_list
+        backend = get_search_backend(self.search_backend, object_list.model, self.search_fields, object_list.db)
+        return backend.search(object_list, self.search_fields, query)
+
+    def add_facet_counts(self, filterset):
+        """
+        Show row counts against the choices of the filters named in facet_counts, or of every
+        filter that can be counted if it is True. Nothing is queried unless the filters are rendered.
+        """
+        if not (self.facet_counts and filterset is not None and isinstance(filterset.queryset, QuerySet)):
+            return
+        if self.query_timeout is not None:
+            # The counts cover the unfiltered queryset, so they would run the slow queries again
+            return
+        filters = facet_filters(filterset, None if self.facet_counts is True else self.facet_counts)
+        if filters:
+            # Validate before the labels become lazy: cleaning a choice field iterates its choices
+            filterset.form.is_valid()
+            cleaned_data = getattr(filterset.form, "cleaned_data", {})
+            values = {name: cleaned_data.get(name) for name in filters}
+            counts = SimpleLazyObject(partial(self.get_facet_counts, filterset, filters, values))
+            label_choices(filterset.form, filters, counts)
+
+    def get_facet_counts(self, filterset, filters, values) -> dict:
+        """
+        {filter name: {key: count}} for the filters, narrowed by the cleaned values of the others
+        """
+        key = self.get_state_key("facets", pagination=False, ordering=False)
+        counts = cache.get(key) if key else None
+        if counts is None:
+            # Rows matching every other filter and the search; count_facets applies the facets themselves
+            data = {k: v for k, v in filterset.data.items() if k not in filters}
+            queryset = type(filterset)(data=data, queryset=filterset.queryset, request=self.request).qs
+            counts = count_facets(self.search_object_list(queryset), filters, values)
+            if key:
+                cache.set(key, counts, self.facet_seconds)
+        return counts
+
+    def get_footer_aggregates(self, table, functions) -> dict:
+        """
+        Values for the footer row declared in the table's Meta.footer, over all the filtered rows
+        """
+        if self.query_timeout is not None:
+            return dict.fromkeys(functions)
+        if self._footer_aggregates is None:
+            key = self.get_state_key("footer", pagination=False, ordering=False)
+            values = cache.get(key) if key else None
+            if values is None:
+                values = compute_aggregates(self.object_list, table, functions)
+                if key:
+                    cache.set(key, values, self.footer_seconds)
+            self._footer_aggregates = values
+        return self._footer_aggregates
+
+    def get_pinned_pks(self, table):
+        """
+        The ordered pks of the filtered and sorted rows when pin_results is set. They are computed
+        on the first render of a table state, or when the table data is refreshed, and kept in the
+        cache so that later pages and scrolling look rows up by pk. None if the rows cannot be pinned.
+        """
+        if not (self.pin_results and isinstance(self.object_list, QuerySet)) or self.query_timeout is not None:
+            return None
+        key = self.get_state_key("pins", pagination=False)
+        if key is None:
+            return None
+        refresh = not self.request.htmx or self.request.htmx.trigger == "table_data"
+        data = None if refresh else cache.get(key)
+        if data is None:
+            # False records that the rows could not be pinned, so they are not tried on every page
+            data = pack_pks(table.data.data, self.pin_max_rows) or False
+            cache.set(key, data, self.pin_seconds)
+        return unpack_pks(data) if data is not False else None
+
+    def get_pinned_objects(self):
+        """
+        The pinned rows as a queryset, for select all; None if there are none or too many for one query
+        """
+        key = self.get_state_key("pins", pagination=False) if self.pin_results else None
+        data = cache.get(key) if key else None
+        if not data:
+            return None
+        pks = unpack_pks(data)
+        queryset = self.get_queryset()
+        max_params = connections[queryset.db].features.max_query_params
+        if max_params and len(pks) > max_params:
+            return None
+        return queryset.filter(pk__in=pks.tolist())
+
+    def get_cache_scope(self):
+        """
+        Who cached data may be shared with: the user, else the session. None prevents caching.
+        Override to share data more widely, e.g. by group when querysets depend only on the group.
+        """
+        if self.public_cache_seconds:
+            # Public tables are the same for everyone and must not load the session
+            return "public"
+        if self.request.user.is_authenticated:
+            return f"user:{self.request.user.pk}"
+        if self.request.session.session_key:
+            return f"session:{self.request.session.session_key}"
+        return None
+
+    def get_toolbar_cache_key(self):
+        """
+        Key for the rendered main toolbar when toolbar_cache_seconds is set. None if the toolbar
+        should not be cached: the paginator and record count change with the data, and the bulk
+        actions form holds the session's CSRF token.
+        """
+        if not self.toolbar_cache_seconds or self.query_timeout is not None:
+            return None
+        if self._toolbar_is_page_dependent():
+            return None
+        return self.get_state_key("toolbar", get_template_library(), pagination=False, columns=True)
+
+    def get_state(self, pagination=True, ordering=True, columns=False) -> dict:
+        """
+        The table state in a canonical form: the filter values, ~search and, optionally, the sort
+        order and grouping, the page and rows per page, and the breakpoint and visible columns.
+        Values that are empty or equal to their default are left out, lists are sorted and
+        everything is a string, so the same state always gives the same dict.
+        """
+        defaults = {**self.STATE_DEFAULTS, "~page": "1", "~per_page": str(self.per_page)}
+        defaults.update({k: v for k, v in self.get_initial_data().items() if self.is_filter_name(k)})
+        excluded = {"~filter_data"}
+        if not pagination:
+            excluded |= {"~page", "~per_page"}
+        if not ordering:
+            excluded |= {"~order_by", "~group"}
+        state = {}
+        for k in {*self.query_dict, *defaults}:
+            if k in excluded or not self.is_state_param(k):
+                continue
+            value = _canonical(self.query_dict.get(k, defaults.get(k, "")))
+            if k == "~search":
+                value = value.strip()
+            if value != _canonical(defaults.get(k, "")):
+                state[k] = value
+        if columns:
+            state["~bp"] = self._bp
+            # Public tables always show the default columns at a breakpoint
+            if self.table is not None and hasattr(self.table, "columns_visible"):
+                # With client_columns the hidden optional columns are rendered too; only the shown ones count
+                hidden = getattr(self.table, "columns_hidden", [])
+                state["~columns"] = [name for name in self.table.columns_visible if name not in hidden]
+            elif not self.public_cache_seconds:
+                bp_values = self.get_breakpoint_values()
+                state["~columns"] = list(visible_columns(self.request, self.get_table_class(), bp_values, self._bp))
+        return dict(sorted(state.items()))
+
+    def get_state_key(self, kind="state", *extra, pagination=True, ordering=True, columns=False, scoped=True):
+        """
+        A hashed key for caching data that depends on the table state: "tbx:<kind>:<digest>" of the
+        view, prefix, get_state() and any extra values. With scoped it also covers get_cache_scope()
+        and is None when there is no scope, e.g. an anonymous user without a session.
+        """
+        scope = self.get_cache_scope() if scoped else None
+        if scoped and scope is None:
+            return None
+        state = self.get_state(pagination=pagination, ordering=ordering, columns=columns)
+        key_data = [type(self).__module__, type(self).__qualname__, self.prefix, scope, state, *extra]
+        digest = hashlib.md5(json.dumps(key_data, sort_keys=True, default=str).encode()).hexdigest()
+        return f"tbx:{kind}:{digest}"
+
     def process_filtered_object_list(self):
         """
         Overide this to do further processing on objects list after filtering
@@ -279,14 +610,9 @@ class TableauxView(TemplateView):
         return self.object_list
 
     def make_query_string(self):
-        # clean up the query string by removing empty parameters relating to this tableaux
-        q_dict = {}
-        for k, v in self.query_dict.items():
-            if self.is_state_param(k):
-                if v != "":
-                    q_dict[k] = v
-            else:
-                q_dict[k] = v
+        # The canonical state of this tableaux followed by any other parameters
+        q_dict = self.get_state()
+        q_dict.update({k: v for k, v in self.query_dict.items() if not self.is_state_param(k)})
         return urlencode(q_dict.items(), doseq=True)
 
     def render_template(
@@ -295,10 +621,16 @@ class TableauxView(TemplateView):
         hx_target=None,
         trigger_client=True,
         update_url=True,
+        regions=None,
         **kwargs,
     ):
-        self.get_filtered_object_list()
-        self.table = build_table(self, prefix=self.prefix, **kwargs)
+        if self.is_superseded():
+            # The browser has already sent a newer request for this table and will ignore this one
+            return HttpResponse(status=204)
+        with stage("filter"):
+            self.get_filtered_object_list()
+        with stage("table"):
+            self.table = build_table(self, prefix=self.prefix, **kwargs)
         query_string = self.make_query_string()
         url = self.request.path
         if self.request.htmx:
@@ -306,13 +638,18 @@ class TableauxView(TemplateView):
         parts = urlsplit(url)
         return_url = urlunsplit((parts.scheme, parts.netloc, parts.path, query_string, parts.fragment))
 
-        context = self.get_context_data(return_url=return_url, query_string=query_string)
+        with stage("context"):
+            context = self.get_context_data(return_url=return_url, query_string=query_string, regions=regions)
         template_name = template_name or self.template_name
-        response = TemplateResponse(
-            request=self.request,
-            template=template_name,
-            context=context,
-        )
+        if template_name == self.templates["tableaux_rows"] and self.wants_json_rows():
+            with stage("json"):
+                response = JsonResponse(rows_json(self.table, context, self.request))
+        else:
+            response = TemplateResponse(
+                request=self.request,
+                template=template_name,
+                context=context,
+            )
         tableaux_id = f"#{self.table.prefix}{hx_target}"
         if hx_target:
             response = retarget(response, tableaux_id)
@@ -329,6 +666,162 @@ class TableauxView(TemplateView):
             response = push_url(response, return_url)
         return response
 
+    # Triggers of requests that replace the table's content, and the kind each belongs to. A newer
+    # request of the same kind makes an older one pointless. Requests that add content, such as
+    # scrolling and expanding a group, fire once and are never dropped.
+    SUPERSEDED_TRIGGERS = {
+        "~sort~": "sort",
+        "~page~": "page",
+        "~row~": "per_page",
+        "~search~": "search",
+        "filter_form": "filter",
+        "~remove~": "filter",
+    }
+    SUPERSEDED_TRIGGER_NAMES = {"filter_button": "filter", "filter_reset": "filter"}
+
+    def superseded_kind(self):
+        """
+        The kind of replacing request this is, or None if it must always be answered
+        """
+        htmx = self.request.htmx
+        if htmx.trigger_name in self.SUPERSEDED_TRIGGER_NAMES:
+            return self.SUPERSEDED_TRIGGER_NAMES[htmx.trigger_name]
+        for marker, kind in self.SUPERSEDED_TRIGGERS.items():
+            if marker in (htmx.trigger or ""):
+                return kind
+        return None
+
+    def register_request_seq(self):
+        """
+        Record the sequence number django_tableaux.js sends with each request as
+        X-Tableaux-Seq: <page id>-<number>. Numbers increase per page load and table, so the
+        highest one seen is the newest request of its kind for this table.
+        """
+        page, _, seq = self.request.headers.get("X-Tableaux-Seq", "").rpartition("-")
+        if not (self.drop_superseded and page and seq.isdigit()) or self.public_cache_seconds:
+            return
+        kind = self.superseded_kind()
+        if kind is None:
+            return
+        key = f"tbx:seq:{self.request.session.session_key}:{type(self).__qualname__}:{self.prefix}:{page}:{kind}"
+        self._request_seq = (key, int(seq))
+        latest = cache.get(key)
+        if latest is None or latest < int(seq):
+            cache.set(key, int(seq), 60)
+
+    def is_superseded(self) -> bool:
+        # True if a newer request for the same table arrived while this one was waiting or running
+        if self._request_seq is None:
+            return False
+        key, seq = self._request_seq
+        latest = cache.get(key)
+        return latest is not None and latest > seq
+
+    def wants_json_rows(self) -> bool:
+        """
+        True if rows should be sent as columnar JSON rather than html.
+        Only requests made through the tableaux-json htmx extension ask for it, and mobile card rows
+        and empty pages are always sent as html.
+        """
+        return (
+            self.json_rows
+            and self.request.headers.get("X-Tableaux-Format") == "json"
+            and not self.table.mobile
+            and bool(self.table.paginated_rows)
+        )
+
+    def render_prefetchable(self, prefetch=False, **kwargs):
+        """
+        Render a page of rows through render_template, serving a copy from the cache if the client
+        prefetched it. A prefetch request only warms the cache and returns 204 No Content.
+        """
+        key = (
+            self._prefetch_cache_key(kwargs.get("template_name"), kwargs.get("regions"))
+            if self.prefetch_pages
+            else None
+        )
+        if key is None:
+            return HttpResponse(status=204) if prefetch else self.render_template(**kwargs)
+        cached = cache.get(key)
+        if prefetch:
+            if cached is None:
+                response = self.render_template(**kwargs)
+                response.render()
+                headers = {k: v for k, v in response.headers.items() if k.startswith("HX-")}
+                cache.set(key, (response.content, headers), self.prefetch_seconds)
+            return HttpResponse(status=204)
+        if cached is not None:
+            content, headers = cached
+            return HttpResponse(content, headers=headers)
+        return self.render_template(**kwargs)
+
+    def _prefetch_cache_key(self, template_name, regions=None):
+        """
+        Key for a prefetched fragment. It covers everything the fragment depends on: the view,
+        the user or session, the table state, the breakpoint and the user's visible columns.
+        """
+        return self.get_state_key("prefetch", template_name, sorted(regions or []), columns=True)
+
+    def render_fragments(self, plan, prefetch=False):
+        """
+        Render only the regions that the plan (a key of fragment_plans) invalidates.
+        The page wrapper is the swap target; other regions are swapped out of band.
+        toolbar_main is added when it holds items that change with the page, including bulk actions.
+        """
+        regions = set(self.fragment_plans[plan])
+        if "page_wrapper" in regions and self._toolbar_is_page_dependent():
+            regions.add("toolbar_main")
+        return self.render_prefetchable(
+            prefetch,
+            template_name=self.templates["tableaux_fragments"],
+            hx_target="page_wrapper",
+            regions=sorted(regions),
+        )
+
+    def _toolbar_is_page_dependent(self) -> bool:
+        # The bulk actions form holds the return URL and the number of rows on the page
+        if self._toolbar_has_items(self.toolbar, self.PAGE_DEPENDENT_ITEMS):
+            return True
+        return self._toolbar_has_items(self.toolbar, ("actions",)) and bool(self.get_bulk_actions())
+
+    @staticmethod
+    def _toolbar_has_items(config, items) -> bool:
+        if not isinstance(config, dict):
+            return False
+        for area_items in config.values():
+            if isinstance(area_items, str):
+                area_items = [area_items]
+            if any(item in items for item in area_items):
+                return True
+        return False
+
+    def render_row_range(self, start, end):
+        """
+        Render rows start to end (zero based, end exclusive) of the sorted and filtered data.
+        Used by windowed infinite scroll to fetch back rows that were dropped from the DOM.
+        """
+        self.row_range = (start, end)
+        return self.render_template(self.templates["tableaux_rows"], trigger_client=False, update_url=False)
+
+    def get_group_column(self):
+        """
+        The column chosen in the group_by toolbar item, if it is one of group_columns
+        """
+        name = self.query_dict.get("~group", "")
+        return name if name in self.group_columns else None
+
+    def render_group_rows(self, key):
+        """
+        Render the first group_rows rows of the group with this key, when its header is expanded
+        """
+        column = self.get_group_column()
+        if column is None:
+            raise ValueError("Group rows requested without a valid ~group")
+        path = column_path(self.get_table_class()(data=[]), column)
+        self.group_filter = group_filter(path, key)
+        self.row_range = (0, self.group_rows)
+        return self.render_template(self.templates["tableaux_group_rows"], trigger_client=False, update_url=False)
+
     def render_table(self):
         return self.render_template(
             template_name=self.templates["tableaux_table_wrapper"],
@@ -427,6 +920,12 @@ class TableauxView(TemplateView):
                 return self.filter_clear_button and self.has_filter_toolbar
             case "paginator":
                 return self.pagination == Pagination.PAGED
+            case "local_filter":
+                return self.table.local
+            case "search":
+                return bool(self.search_fields)
+            case "group_by":
+                return bool(self.group_columns)
             case _:
                 return True
 
@@ -458,28 +957,35 @@ class TableauxView(TemplateView):
             "object_list": self.get_filtered_object_list(),
             "templates": self.templates,
             "filters": [],
-            "buttons": self.get_buttons(),
-            "actions": self.get_bulk_actions(),
+            # Lazy so that responses which leave out the toolbars do not compute them
+            "buttons": SimpleLazyObject(self.get_buttons),
+            "actions": SimpleLazyObject(self.get_bulk_actions),
             "rows": self.rows_list(),
             "page": self.query_dict.get("~page", "1"),
             "per_page": self.query_dict.get("~per_page", 20),
             "order_by": self.query_dict.get("~order_by", ""),
+            "search": self.query_dict.get("~search", ""),
+            "group_choices": [
+                (name, self.table.columns[name].header) for name in self.group_columns if name in self.table.columns
+            ],
             "bp": self._bp,
             "breakpoints": breakpoints(self.table),
             "breakpoint_values": self.get_breakpoint_values(),
             "toolbar_visible": bool(self.toolbar),
-            "toolbar_areas": self._build_toolbar_areas(self.toolbar),
-            "toolbar_filter_areas": self._build_toolbar_areas(self.toolbar_filter),
-            "toolbar_bottom_areas": self._build_toolbar_areas(self.toolbar_bottom),
+            "toolbar_areas": SimpleLazyObject(partial(self._build_toolbar_areas, self.toolbar)),
+            "toolbar_filter_areas": SimpleLazyObject(partial(self._build_toolbar_areas, self.toolbar_filter)),
+            "toolbar_bottom_areas": SimpleLazyObject(partial(self._build_toolbar_areas, self.toolbar_bottom)),
             **self._record_count_context(),
             "Pagination": Pagination,
             "FilterStyle": FilterStyle,
             "ClickAction": ClickAction,
+            "query_timeout": self.query_timeout,
         }
         context.update(kwargs)
 
         filter_dict = {}
         if self.filterset_class:
+            self.add_facet_counts(context["filter"])
             initial = self.get_initial_data()
             filter_dict = {
                 k: v
@@ -537,6 +1043,7 @@ class TableauxView(TemplateView):
         value = params.get(column_name, None)
         print(bits[1], value)
         if value:
+            self.record_write()
             return self.cell_changed(
                 record_pk=bits[1],
                 column_name=column_name,
@@ -553,6 +1060,7 @@ class TableauxView(TemplateView):
                 id = bits[-1]
                 column = "_".join(bits[1:-1])
                 value = request.POST[column]
+                self.record_write()
                 return self.handle_cell_changed(id, column, value)
 
             # Assume this is an action performed on a queryset
@@ -562,7 +1070,10 @@ class TableauxView(TemplateView):
             if "select_all" in request.POST:
                 subset = "all"
                 self.selected_ids = []
-                self.selected_objects = self.get_filtered_object_list()
+                # The rows the user saw, if they were pinned
+                self.selected_objects = self.get_pinned_objects()
+                if self.selected_objects is None:
+                    self.selected_objects = self.get_filtered_object_list()
             else:
                 subset = "selected"
                 if request.POST.get("selected_ids", None):
@@ -579,6 +1090,7 @@ class TableauxView(TemplateView):
                         f"{self.return_url}{separator}_export={export_format}&_subset={subset}"
                     )
 
+                self.record_write()
                 response = self.handle_action(request, request.htmx.trigger_name)
                 if response:
                     return response
@@ -667,6 +1179,104 @@ class TableauxView(TemplateView):
         return self.filter_pills
 
 
+class TableauxBatchView(View):
+    """
+    Load several prefixed tableaux with a single HTMX request, see the {% tableaux_batch %} tag.
+    Each table is rendered by its own view and returned as an out-of-band swap, so a dashboard
+    pays the request overhead and session load once rather than once per table.
+    """
+
+    concurrent = True
+
+    def get(self, request, *args, **kwargs):
+        specs = [spec.partition("|")[::2] for spec in request.GET.get("tables", "").split(",") if spec]
+        matches = []
+        for url_name, prefix in specs:
+            # Only tableaux views may be loaded, so a client cannot call other views through the batch
+            try:
+                path = reverse(url_name)
+            except NoReverseMatch:
+                return HttpResponseBadRequest(f"Unknown tableaux url name: {url_name}")
+            match = resolve(path)
+            view_class = getattr(match.func, "view_class", None)
+            if not (isinstance(view_class, type) and issubclass(view_class, TableauxView)):
+                return HttpResponseBadRequest(f"Not a tableaux view: {url_name}")
+            matches.append((path, match, prefix))
+        if hasattr(request, "user"):
+            # Evaluate the lazy user now, so that every table shares the one lookup
+            is_authenticated = request.user.is_authenticated  # noqa: F841
+        loaders = [partial(self.render_tableaux, path, match, prefix) for path, match, prefix in matches]
+        session = getattr(request, "session", None)
+        if self.concurrent and len(loaders) > 1 and connection_allows_concurrency():
+            # Each thread writes to its own copy of the session; the changes are merged afterwards
+            base = dict(session.items()) if session is not None else {}
+            sessions = [self.copy_session(session, base) for _ in loaders]
+            contents = run_concurrently(
+                *[partial(loader, table_session) for loader, table_session in zip(loaders, sessions)]
+            )
+            for table_session in sessions:
+                self.merge_session(session, base, table_session)
+        else:
+            contents = [loader(session) for loader in loaders]
+        response = HttpResponse("".join(contents))
+        return trigger_client_event(response, name="initTableaux", after="swap")
+
+    @staticmethod
+    def copy_session(session, base):
+        if session is None:
+            return None
+        table_session = copy.copy(session)
+        table_session._session_cache = copy.deepcopy(base)
+        table_session.modified = False
+        return table_session
+
+    @staticmethod
+    def merge_session(session, base, table_session):
+        if table_session is None or not table_session.modified:
+            return
+        for key in base.keys() - table_session.keys():
+            session.pop(key, None)
+        for key, value in table_session.items():
+            if key not in base or base[key] != value:
+                session[key] = value
+
+    def render_tableaux(self, path, match, prefix, session=None):
+        """
+        Render one tableaux as though {% tableaux url_name prefix %} had requested it.
+        A table whose view does not answer with 200 is left out.
+        """
+        request = copy.copy(self.request)
+        request.path = request.path_info = path
+        request.resolver_match = match
+        if session is not None:
+            request.session = session
+        request.META = {
+            **self.request.META,
+            "PATH_INFO": path,
+            "HTTP_HX_TRIGGER_NAME": "table_load",
+            "HTTP_HX_TARGET": f"{prefix}tableaux_wrapper",
+        }
+        # headers is a cached property built from META
+        request.__dict__.pop("headers", None)
+        request.GET = QueryDict(mutable=True)
+        request.GET.update(
+            {
+                "bp": self.request.GET.get("bp", ""),
+                "prefix": prefix,
+                "query_string": self.request.GET.get("query_string", ""),
+                "_batch": "1",
+            }
+        )
+        request.htmx = HtmxDetails(request)
+        response = match.func(request, *match.args, **match.kwargs)
+        if response.status_code != 200:
+            logger.warning("Batch load of %s returned %s", path, response.status_code)
+            return ""
+        if hasattr(response, "render"):
+            response.render()
+        return response.content.decode(response.charset)
+
+
 class SelectedMixin:
     """
     Use in views that are called to perform an action on selected objects.
@@ -720,5 +1330,3 @@ class SelectedMixin:
 #     def reload_table(self):
 #         response = HttpResponse("")
 #         return trigger_client_event(response, "reload", {"url": self.request.htmx.current_url_abs_path})
-
-
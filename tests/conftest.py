@@ -0,0 +1,52 @@
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.cache import SessionStore
+from django.test import RequestFactory
+from django_htmx.middleware import HtmxDetails
+
+from myapp.models import Model1
+
+
+def htmx_request(trigger, session=None, headers=None, **data):
+    """
+    A GET sent by HTMX from the table at http://testserver/, set up the way the middleware would
+    """
+    headers = {"HX-Request": "true", "HX-Trigger": trigger, "HX-Current-URL": "http://testserver/", **(headers or {})}
+    request = RequestFactory().get("/", data, headers=headers)
+    request.htmx = HtmxDetails(request)
+    request.session = SessionStore() if session is None else session
+    request.user = AnonymousUser()
+    return request
+
+
+def scroll_request(session=None, headers=None, **data):
+    """
+    The request for the next page of rows when a load more or infinite scroll sentinel is reached
+    """
+    return htmx_request("_tr_last", session, headers, **{"~page": "1", "_scroll": "true", "_pagex": "1", **data})
+
+
+def render(view_class, request, **initkwargs):
+    response = view_class.as_view(**initkwargs)(request)
+    response.render()
+    return response.content.decode()
+
+
+@pytest.fixture
+def tableaux_settings(settings):
+    # Only the view's own attributes apply
+    settings.DJANGO_TABLEAUX = {}
+    return settings
+
+
+@pytest.fixture
+def session():
+    store = SessionStore()
+    store.save()
+    return store
+
+
+@pytest.fixture
+def objects(db):
+    for x in range(25):
+        Model1.objects.create(name=f"name_{x:02}", description="", decimal=x)
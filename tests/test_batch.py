@@ -0,0 +1,84 @@
+import json
+
+import pytest
+from django.contrib.sessions.backends.signed_cookies import SessionStore
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import path
+from django_htmx.middleware import HtmxDetails
+
+from django_tableaux import views
+from django_tableaux.views import TableauxBatchView, TableauxView
+
+
+class EchoView(TableauxView):
+    def get(self, request, *args, **kwargs):
+        # Echo what a TableauxView would see when loaded by the batch view
+        request.session[request.GET["prefix"]] = True
+        return HttpResponse(
+            f'<div id="{request.GET["prefix"]}tableaux_wrapper">'
+            f"{request.path}|{request.htmx.trigger_name}|{request.htmx.target}|{request.GET['bp']}</div>"
+        )
+
+
+class GoneView(TableauxView):
+    def get(self, request, *args, **kwargs):
+        return HttpResponse(status=403)
+
+
+def plain_view(request):
+    return HttpResponse("secret")
+
+
+urlpatterns = [
+    path("orders/", EchoView.as_view(), name="orders"),
+    path("invoices/", EchoView.as_view(), name="invoices"),
+    path("gone/", GoneView.as_view(), name="gone"),
+    path("plain/", plain_view, name="plain"),
+    path("batch/", TableauxBatchView.as_view(), name="tableaux_batch"),
+]
+
+
+def batch(tables):
+    request = RequestFactory().get("/batch/", {"tables": tables, "bp": "md"}, headers={"HX-Request": "true"})
+    request.htmx = HtmxDetails(request)
+    request.session = SessionStore()
+    return request, TableauxBatchView.as_view()(request)
+
+
+@pytest.mark.urls(__name__)
+def test_batch_renders_each_table_in_one_response(settings):
+    settings.DJANGO_TABLEAUX = {}
+    request, response = batch("orders|o_,invoices|i_")
+    content = response.content.decode()
+    assert '<div id="o_tableaux_wrapper">/orders/|table_load|o_tableaux_wrapper|md</div>' in content
+    assert '<div id="i_tableaux_wrapper">/invoices/|table_load|i_tableaux_wrapper|md</div>' in content
+    # Both tables shared the one session
+    assert request.session["o_"] and request.session["i_"]
+    assert "initTableaux" in json.loads(response.headers["HX-Trigger-After-Swap"])
+
+
+@pytest.mark.urls(__name__)
+def test_concurrent_tables_write_their_own_session_copy(settings, monkeypatch):
+    settings.DJANGO_TABLEAUX = {}
+    monkeypatch.setattr(views, "connection_allows_concurrency", lambda: True)
+    request, response = batch("orders|o_,invoices|i_")
+    assert response.content.decode().count("table_load") == 2
+    assert request.session["o_"] and request.session["i_"]
+
+
+@pytest.mark.urls(__name__)
+@pytest.mark.parametrize("tables", ["plain|p_", "missing|m_"])
+def test_only_tableaux_views_can_be_loaded(settings, tables):
+    settings.DJANGO_TABLEAUX = {}
+    _, response = batch(f"orders|o_,{tables}")
+    assert response.status_code == 400
+    assert b"secret" not in response.content
+
+
+@pytest.mark.urls(__name__)
+def test_tables_that_fail_are_left_out(settings):
+    settings.DJANGO_TABLEAUX = {}
+    _, response = batch("gone|g_,orders|o_")
+    assert response.status_code == 200
+    assert response.content.decode() == '<div id="o_tableaux_wrapper">/orders/|table_load|o_tableaux_wrapper|md</div>'
@@ -0,0 +1,70 @@
+import django_tables2 as tables
+import pytest
+
+from django_tableaux.columns import CurrencyColumn, cached_render
+from django_tableaux.instrumentation import recording
+from myapp.models import Model1
+
+
+class CachedCurrencyColumn(CurrencyColumn):
+    render = cached_render(CurrencyColumn.render)
+
+
+class CachedTable(tables.Table):
+    pounds = CachedCurrencyColumn(accessor="decimal", prefix="£")
+    dollars = CachedCurrencyColumn(accessor="decimal", prefix="$")
+    description = tables.Column()
+
+    @cached_render(version="decimal")
+    def render_description(self, value):
+        return value.upper()
+
+
+def cells(table, name):
+    return [row.get_cell(name) for row in table.rows]
+
+
+@pytest.fixture(autouse=True)
+def clear():
+    CachedCurrencyColumn.render.cache_clear()
+    CachedTable.render_description.cache_clear()
+
+
+def test_values_are_rendered_once(tableaux_settings):
+    data = [{"decimal": 1000}, {"decimal": 2000}, {"decimal": 1000}]
+    with recording() as record:
+        assert cells(CachedTable(data), "pounds") == ["£1,000", "£2,000", "£1,000"]
+        # A second table, as in a later request, reuses the values
+        assert cells(CachedTable(data), "pounds") == ["£1,000", "£2,000", "£1,000"]
+    info = CachedCurrencyColumn.render.cache_info()
+    assert info["misses"] == 2 and info["hits"] == 4
+    assert record["counters"] == {
+        "render_cache.CurrencyColumn.render.hits": 4,
+        "render_cache.CurrencyColumn.render.misses": 2,
+    }
+
+
+def test_columns_with_different_options_are_kept_apart(tableaux_settings):
+    table = CachedTable([{"decimal": 5}])
+    assert cells(table, "pounds") == ["£5"] and cells(table, "dollars") == ["$5"]
+
+
+@pytest.mark.django_db
+def test_version_keys_by_record():
+    first = Model1.objects.create(name="a", description="one", decimal=1)
+    second = Model1.objects.create(name="b", description="two", decimal=1)
+    assert cells(CachedTable([first, second]), "description") == ["ONE", "TWO"]
+    first.description = "changed"
+    assert cells(CachedTable([first]), "description") == ["ONE"]
+    first.decimal = 2
+    assert cells(CachedTable([first]), "description") == ["CHANGED"]
+
+
+def test_size_is_bounded():
+    @cached_render(maxsize=2)
+    def render(self, value):
+        return value
+
+    for value in range(5):
+        render(None, value=value)
+    assert render.cache_info()["currsize"] == 2
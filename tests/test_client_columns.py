@@ -0,0 +1,47 @@
+import django_tables2 as tables
+import pytest
+
+from django_tableaux.models import Pagination
+from django_tableaux.utils import visible_columns
+from django_tableaux.views import TableauxView
+from myapp.models import Model1
+from tests.conftest import htmx_request, scroll_request
+
+
+class Table1(tables.Table):
+    class Meta:
+        model = Model1
+        fields = ("name", "description", "decimal")
+        columns = {"name": "fixed", "description": "default"}
+
+
+class ClientColumnsView(TableauxView):
+    model = Model1
+    table_class = Table1
+    pagination = Pagination.LOAD
+    per_page = 10
+    client_columns = True
+
+
+@pytest.mark.django_db
+def test_hidden_optional_columns_are_rendered(tableaux_settings):
+    Model1.objects.create(name="name_0", description="", decimal=1)
+    response = ClientColumnsView.as_view()(scroll_request(_pagex="0"))
+    response.render()
+    content = response.content.decode()
+    assert response.context_data["table"].columns_hidden == ["decimal"]
+    for name in ("name", "description", "decimal"):
+        assert f"tbx-col-{name}" in content
+
+
+@pytest.mark.django_db
+def test_column_changes_saved_without_render(tableaux_settings, session):
+    response = ClientColumnsView.as_view()(htmx_request("~cols~", session, _columns="decimal"))
+    assert response.status_code == 204
+    assert visible_columns(htmx_request("", session), Table1, {}, "XXX") == ["name", "decimal"]
+    # Cell indexes count the hidden columns that are in the DOM
+    assert visible_columns(htmx_request("", session), Table1, {}, "XXX", include_optional=True) == [
+        "name",
+        "description",
+        "decimal",
+    ]
@@ -0,0 +1,51 @@
+import threading
+
+import django_tables2 as tables
+import pytest
+
+from django_tableaux.columns import CounterColumn
+from django_tableaux.views import TableauxView
+from myapp.models import Model1
+from tests.conftest import htmx_request
+
+
+class CounterTable(tables.Table):
+    counter = CounterColumn()
+
+    class Meta:
+        model = Model1
+        fields = ("counter", "name")
+
+
+class CounterView(TableauxView):
+    model = Model1
+    table_class = CounterTable
+
+
+def counters(table):
+    return [row.get_cell("counter") for row in table.page.object_list]
+
+
+def test_counter_starts_at_page_offset(tableaux_settings, objects):
+    request = htmx_request("~page~2", **{"~page": "2", "~per_page": "10"})
+    response = CounterView.as_view()(request)
+    assert counters(response.context_data["table"]) == list(range(11, 21))
+
+
+def test_concurrent_tables_count_independently():
+    data = [{"name": str(x)} for x in range(200)]
+    results = []
+    barrier = threading.Barrier(4)
+
+    def render():
+        table = CounterTable(data)
+        table.paginate(per_page=200)
+        barrier.wait()
+        results.append(counters(table))
+
+    threads = [threading.Thread(target=render) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [list(range(1, 201))] * 4
@@ -0,0 +1,91 @@
+import django_filters
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.cache import SessionStore
+from django.test import RequestFactory
+
+from django_tableaux.facets import count_facets, facet_filters
+from django_tableaux.views import TableauxView
+from myapp.models import Model1
+
+NAMES = [("a", "A"), ("b", "B")]
+DESCRIPTIONS = [("x", "X"), ("y", "Y")]
+
+
+class Model1Filter(django_filters.FilterSet):
+    name = django_filters.ChoiceFilter(choices=NAMES)
+    description = django_filters.ChoiceFilter(choices=DESCRIPTIONS)
+    decimal = django_filters.NumberFilter(lookup_expr="gte")
+
+    class Meta:
+        model = Model1
+        fields = ["name", "description", "decimal"]
+
+
+class FacetView(TableauxView):
+    model = Model1
+    filterset_class = Model1Filter
+    facet_counts = True
+
+
+@pytest.fixture
+def records(db):
+    for name, description, decimal in [("a", "x", 1), ("a", "y", 2), ("b", "x", 3), ("b", "x", 4), ("a", "x", 5)]:
+        Model1.objects.create(name=name, description=description, decimal=decimal)
+
+
+def make_view(params):
+    request = RequestFactory().get("/", params)
+    request.session = SessionStore()
+    request.session.save()
+    request.user = AnonymousUser()
+    view = FacetView()
+    view.setup(request)
+    view.query_dict = params
+    return view
+
+
+def test_only_equality_choice_filters_are_facets():
+    assert list(facet_filters(Model1Filter())) == ["name", "description"]
+
+
+def test_each_facet_ignores_its_own_filter(records, django_assert_num_queries):
+    filterset = Model1Filter(data={"name": "a", "description": "x"}, queryset=Model1.objects.all())
+    filters = facet_filters(filterset)
+    with django_assert_num_queries(1):
+        counts = count_facets(Model1.objects.all(), filters, {"name": "a", "description": "x"})
+    # names among description x; descriptions among name a
+    assert counts == {"name": {"a": 2, "b": 2}, "description": {"x": 2, "y": 1}}
+
+
+def test_labels_show_counts_of_other_filters(settings, records):
+    settings.DJANGO_TABLEAUX = {}
+    view = make_view({"description": "x", "decimal": "2"})
+    view.get_filtered_object_list()
+    view.add_facet_counts(view.filterset)
+    assert list(view.filterset.form.fields["name"].choices) == [("", "---------"), ("a", "A (1)"), ("b", "B (2)")]
+    assert list(view.filterset.form.fields["description"].choices)[1:] == [("x", "X (3)"), ("y", "Y (1)")]
+
+
+def test_counts_are_cached_by_filter_state(settings, records, django_assert_num_queries):
+    settings.DJANGO_TABLEAUX = {}
+    view = make_view({"name": "b"})
+    view.get_filtered_object_list()
+    filters = facet_filters(view.filterset)
+    first = view.get_facet_counts(view.filterset, filters, {"name": "b"})
+    with django_assert_num_queries(0):
+        assert view.get_facet_counts(view.filterset, filters, {"name": "b"}) == first
+    other = make_view({"name": "a"})
+    other.request.session = view.request.session
+    other.get_filtered_object_list()
+    assert other.get_facet_counts(other.filterset, filters, {"name": "a"})["description"] == {"x": 2, "y": 1}
+
+
+def test_unvalidated_form_counts_its_values(settings, records):
+    # The modal builds a fresh filterset whose form is validated only as its choices render
+    settings.DJANGO_TABLEAUX = {}
+    view = make_view({"name": "a"})
+    filterset = view.get_filterset(view.get_queryset())
+    view.add_facet_counts(filterset)
+    html = str(filterset.form)
+    assert "X (2)" in html and "Y (1)" in html
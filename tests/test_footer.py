@@ -0,0 +1,80 @@
+import re
+
+import django_tables2 as tables
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.cache import SessionStore
+from django.core.exceptions import ImproperlyConfigured
+from django.test import RequestFactory
+from django_htmx.middleware import HtmxDetails
+
+from django_tableaux.aggregates import compute_aggregates, footer_functions
+from django_tableaux.columns import CurrencyColumn
+from django_tableaux.views import TableauxView
+from myapp.models import Model1
+
+
+class FooterTable(tables.Table):
+    name = tables.Column()
+    decimal = CurrencyColumn(prefix="£")
+
+    class Meta:
+        model = Model1
+        fields = ("name", "decimal")
+        footer = {"name": "count", "decimal": "sum"}
+
+
+class FooterView(TableauxView):
+    model = Model1
+    table_class = FooterTable
+    per_page = 10
+
+
+@pytest.fixture
+def objects(db):
+    for x in range(25):
+        Model1.objects.create(name=f"name_{x:02}", description="", decimal=1000 + x)
+
+
+def page_request(**data):
+    request = RequestFactory().get(
+        "/", data, headers={"HX-Request": "true", "HX-Trigger": "~page~2", "HX-Current-URL": "http://testserver/"}
+    )
+    request.htmx = HtmxDetails(request)
+    request.session = SessionStore()
+    request.session.save()
+    request.user = AnonymousUser()
+    return request
+
+
+def test_aggregates_in_one_query(objects, django_assert_num_queries):
+    table = FooterTable(data=[])
+    with django_assert_num_queries(1):
+        values = compute_aggregates(Model1.objects.all(), table, footer_functions(table))
+    assert values == {"name": 25, "decimal": 25300}
+
+
+def test_aggregates_over_a_list():
+    table = FooterTable(data=[])
+    data = [{"name": "a", "decimal": 2}, {"name": "b", "decimal": 3}, {"name": None, "decimal": 4}]
+    assert compute_aggregates(data, table, {"name": "count", "decimal": "avg"}) == {"name": 2, "decimal": 3}
+
+
+def test_bad_footer_function():
+    class BadTable(FooterTable):
+        class Meta(FooterTable.Meta):
+            footer = {"decimal": "median"}
+
+    with pytest.raises(ImproperlyConfigured):
+        footer_functions(BadTable(data=[]))
+
+
+def test_footer_covers_every_page(settings, objects):
+    settings.DJANGO_TABLEAUX = {}
+    response = FooterView.as_view()(page_request(**{"~page": "1"}))
+    response.render()
+    content = response.content.decode()
+    assert "<tfoot" in content
+    footer = content[content.index("<tfoot") :]
+    assert re.search(r"<td[^>]*>25</td>", footer)
+    assert "£25,300" in footer
@@ -0,0 +1,54 @@
+import pytest
+
+from django_tableaux.views import TableauxView
+from myapp.models import Model1
+from tests.conftest import htmx_request, render
+
+
+class FragmentView(TableauxView):
+    model = Model1
+    per_page = 10
+    toolbar = {"left": "actions", "right": "buttons"}
+
+    def get_bulk_actions(self):
+        return []
+
+    def get_buttons(self):
+        raise AssertionError("toolbar computed")
+
+
+@pytest.mark.parametrize("trigger", ["~sort~name", "~page~2"])
+def test_only_invalidated_regions_are_rendered(tableaux_settings, objects, trigger):
+    response = FragmentView.as_view()(htmx_request(trigger, **{"~page": "3", "~order_by": "name"}))
+    response.render()
+    content = response.content.decode()
+    assert response.headers["HX-Retarget"] == "#page_wrapper"
+    assert 'id="page_wrapper"' in content
+    assert 'id="tableaux_state" hx-swap-oob="outerHTML"' in content
+    assert "toolbar_main" not in content
+    assert "filter_form" not in content
+
+
+def test_sort_resets_page_in_state(tableaux_settings, objects):
+    content = render(FragmentView, htmx_request("~sort~name", **{"~page": "3", "~order_by": "name"}))
+    assert '<input type="hidden" name="~page" value="1">' in content
+    assert '<input type="hidden" name="~order_by" value="-name">' in content
+
+
+def test_toolbar_with_page_items_is_included(tableaux_settings, objects):
+    class PagerView(FragmentView):
+        toolbar = {"left": "paginator"}
+
+    assert 'id="toolbar_main" hx-swap-oob="outerHTML"' in render(PagerView, htmx_request("~page~2"))
+
+
+def test_bulk_actions_get_the_new_return_url(tableaux_settings, objects):
+    class ActionsView(FragmentView):
+        toolbar = {"left": "actions"}
+
+        def get_bulk_actions(self):
+            return [("delete", "Delete")]
+
+    content = render(ActionsView, htmx_request("~page~2", **{"~page": "1"}))
+    assert 'id="toolbar_main" hx-swap-oob="outerHTML"' in content
+    assert '<input type="hidden" name="return_url" value="http://testserver/?~page=2">' in content
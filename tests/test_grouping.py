@@ -0,0 +1,65 @@
+import json
+import re
+
+import django_tables2 as tables
+import pytest
+
+from django_tableaux.models import Pagination
+from django_tableaux.views import TableauxView
+from myapp.models import Model1
+from tests.conftest import htmx_request, render
+
+
+class GroupTable(tables.Table):
+    class Meta:
+        model = Model1
+        fields = ("name", "description", "decimal")
+        footer = {"decimal": "sum"}
+
+
+class GroupView(TableauxView):
+    model = Model1
+    table_class = GroupTable
+    group_columns = ["description"]
+    group_rows = 2
+
+
+@pytest.fixture
+def objects(db):
+    for x in range(5):
+        Model1.objects.create(name=f"name_{x}", description="odd" if x % 2 else "even", decimal=x)
+
+
+def test_group_headers_with_counts_and_subtotals(tableaux_settings, objects):
+    content = render(GroupView, htmx_request("~page~1", **{"~group": "description"}))
+    assert content.count('class="tbx-group-header"') == 2
+    assert "even (3)" in content and "odd (2)" in content
+    # Subtotals 0 + 2 + 4 and 1 + 3
+    cells = re.findall(r"<td[^>]*>\s*([^<]*?)\s*</td>", content)
+    assert "6" in cells and "4" in cells
+    assert "name_0" not in content
+
+
+def test_group_rows_load_on_expand(tableaux_settings, objects):
+    content = render(GroupView, htmx_request("~grp~1", **{"~group": "description", "_group": json.dumps("even")}))
+    assert "name_0" in content and "name_2" in content
+    assert "name_1" not in content
+    assert "Showing 2 of 3 rows" in content
+
+
+def test_unknown_group_column_is_ignored(tableaux_settings, objects):
+    content = render(GroupView, htmx_request("~page~1", **{"~group": "name"}))
+    assert "tbx-group-header" not in content
+    assert "name_0" in content
+
+
+def test_bad_group_key_is_a_bad_request(tableaux_settings, objects):
+    with pytest.raises(ValueError, match="Bad htmx get request"):
+        render(GroupView, htmx_request("~grp~1", **{"~group": "description", "_group": "{not json"}))
+
+
+def test_every_group_shows_without_a_paginator(tableaux_settings, db):
+    for x in range(5):
+        Model1.objects.create(name=f"name_{x}", description=f"group_{x}", decimal=x)
+    request = htmx_request("~page~1", **{"~group": "description", "~per_page": "2"})
+    assert render(GroupView, request, pagination=Pagination.INFINITE).count('class="tbx-group-header"') == 5
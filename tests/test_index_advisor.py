@@ -0,0 +1,91 @@
+from io import StringIO
+from types import SimpleNamespace
+
+import django_filters
+import pytest
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.core.management import call_command
+from django.db.migrations.graph import MigrationGraph
+from django.db.models.functions import Upper
+from django.urls import path
+
+from django_tableaux.management.commands.tableaux_index_advisor import is_indexed, migration_position, suggest_index
+from django_tableaux.views import TableauxView
+from myapp.models import Model1
+
+
+class Model1Filter(django_filters.FilterSet):
+    name = django_filters.CharFilter(lookup_expr="icontains")
+    decimal = django_filters.NumberFilter()
+
+    class Meta:
+        model = Model1
+        fields = ["name", "decimal"]
+
+
+class Model1View(TableauxView):
+    model = Model1
+    filterset_class = Model1Filter
+
+
+urlpatterns = [path("model1/", Model1View.as_view(), name="model1")]
+
+
+def run_advisor(*args):
+    out = StringIO()
+    call_command("tableaux_index_advisor", *args, stdout=out)
+    return out.getvalue()
+
+
+@pytest.mark.urls(__name__)
+@pytest.mark.django_db
+def test_reports_unindexed_order_and_filter_fields():
+    Model1.objects.create(name="name_0", description="", decimal=1)
+    output = run_advisor()
+    assert "model1: order_by on name (myapp.Model1.name) is not indexed; add Index" in output
+    assert "model1: exact on decimal (myapp.Model1.decimal) is not indexed; add Index" in output
+    # SQLite has no index type that helps a contains lookup
+    assert "icontains on name (myapp.Model1.name) is not indexed; no index can help this lookup" in output
+    assert "order_by on id" not in output
+    assert "[full scan or sort]" in output
+
+
+@pytest.mark.urls(__name__)
+@pytest.mark.django_db
+def test_emit_migration_dry_run():
+    output = run_advisor("--no-explain", "--emit-migration", "--dry-run")
+    assert "myapp/migrations/0003_tableaux_indexes.py" in output
+    assert "migrations.AddIndex(" in output
+    assert "model_name='model1'" in output
+
+
+def test_trigram_index_must_match_the_lookup():
+    field = Model1._meta.get_field("name")
+    plain = GinIndex(fields=["name"], name="plain_gin")
+    trigram = GinIndex(fields=["name"], opclasses=["gin_trgm_ops"], name="trgm_gin")
+    upper = GinIndex(OpClass(Upper("name"), name="gin_trgm_ops"), name="upper_gin")
+
+    def indexed(index, lookup):
+        return is_indexed(SimpleNamespace(_meta=SimpleNamespace(indexes=[index])), field, lookup)
+
+    assert not indexed(plain, "contains") and not indexed(plain, "icontains")
+    assert indexed(trigram, "contains") and not indexed(trigram, "icontains")
+    assert indexed(upper, "icontains") and not indexed(upper, "contains")
+
+
+def test_case_insensitive_lookups_get_an_upper_expression_index():
+    field = Model1._meta.get_field("name")
+    index = suggest_index(Model1, field, "icontains", "postgresql")
+    assert index.expressions == (OpClass(Upper("name"), name="gin_trgm_ops"),)
+    assert len(index.name) <= 30
+    assert is_indexed(SimpleNamespace(_meta=SimpleNamespace(indexes=[index])), field, "icontains")
+    assert suggest_index(Model1, field, "contains", "postgresql").opclasses == ["gin_trgm_ops"]
+
+
+def test_migration_follows_every_leaf():
+    graph = MigrationGraph()
+    for name in ("0001_initial", "0002_a", "0003_b"):
+        graph.add_node(("myapp", name), None)
+    graph.add_dependency(None, ("myapp", "0002_a"), ("myapp", "0001_initial"))
+    graph.add_dependency(None, ("myapp", "0003_b"), ("myapp", "0001_initial"))
+    assert migration_position(graph, "myapp") == (4, [("myapp", "0002_a"), ("myapp", "0003_b")])
@@ -0,0 +1,52 @@
+import json
+
+import django_tables2 as tables
+import pytest
+
+from django_tableaux.models import Pagination
+from django_tableaux.views import TableauxView
+from myapp.models import Model1
+from tests.conftest import render, scroll_request
+
+
+class Table1(tables.Table):
+    class Meta:
+        model = Model1
+        fields = ("name", "decimal")
+
+    def render_decimal(self, value):
+        return f"<{value}>"
+
+
+class JsonView(TableauxView):
+    model = Model1
+    table_class = Table1
+    pagination = Pagination.LOAD
+    per_page = 10
+    json_rows = True
+
+
+@pytest.fixture
+def objects(db):
+    # Names that must be escaped
+    for x in range(25):
+        Model1.objects.create(name=f"<b>{x}</b>", description="", decimal=x)
+
+
+def test_rows_sent_as_columnar_json(tableaux_settings, objects):
+    response = JsonView.as_view()(scroll_request(headers={"X-Tableaux-Format": "json"}))
+    assert response["Content-Type"] == "application/json"
+    data = json.loads(response.content)
+    assert data["columns"] == ["name", "decimal"]
+    assert len(data["pks"]) == 10
+    # Plain values are sent as text, custom renders as escaped html
+    assert data["html"] == [False, True]
+    assert data["values"][0][0] == "<b>10</b>"
+    assert data["values"][1][0] == "&lt;10.00&gt;"
+    # Alternating row classes are sent once each
+    assert len(data["attrs"]) == 2
+    assert 'id="_tr_last"' in data["tail"]
+
+
+def test_rows_sent_as_html_without_header(tableaux_settings, objects):
+    assert "&lt;b&gt;10&lt;/b&gt;" in render(JsonView, scroll_request())
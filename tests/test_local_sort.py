@@ -0,0 +1,73 @@
+import datetime
+from decimal import Decimal
+
+import django_tables2 as tables
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.cache import SessionStore
+from django.test import RequestFactory
+
+from django_tableaux.models import Pagination
+from django_tableaux.table import build_table
+from django_tableaux.templatetags.django_tableaux import sort_key
+from django_tableaux.views import TableauxView
+from myapp.models import Model1
+
+
+class Table1(tables.Table):
+    class Meta:
+        model = Model1
+        fields = ("name", "decimal")
+
+
+class LocalView(TableauxView):
+    model = Model1
+    table_class = Table1
+    pagination = Pagination.NONE
+    local_rows_threshold = 5
+
+
+def make_view(view_class):
+    request = RequestFactory().get("/")
+    request.session = SessionStore()
+    request.user = AnonymousUser()
+    view = view_class()
+    view.setup(request)
+    view._bp = ""
+    view.get_filtered_object_list()
+    return view
+
+
+@pytest.mark.django_db
+def test_local_below_threshold(settings):
+    settings.DJANGO_TABLEAUX = {}
+    for x in range(5):
+        Model1.objects.create(name=f"name_{x}", description="", decimal=x)
+    assert build_table(make_view(LocalView)).local
+    Model1.objects.create(name="name_5", description="", decimal=5)
+    assert not build_table(make_view(LocalView)).local
+
+
+@pytest.mark.django_db
+def test_local_only_without_pagination(settings):
+    settings.DJANGO_TABLEAUX = {}
+
+    class PagedView(LocalView):
+        pagination = Pagination.PAGED
+
+    assert not build_table(make_view(PagedView)).local
+
+
+def test_sort_keys_are_typed():
+    class Column:
+        def __init__(self, name):
+            self.order_by = (tables.utils.OrderBy(name),)
+
+    record = {
+        "number": Decimal("1.50"),
+        "flag": True,
+        "day": datetime.date(2024, 3, 1),
+        "text": "abc",
+        "empty": None,
+    }
+    assert [sort_key(record, Column(name)) for name in record] == ["1.50", "1", "2024-03-01", "abc", ""]
@@ -0,0 +1,85 @@
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.cache import SessionStore
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django_htmx.middleware import HtmxDetails
+
+from django_tableaux.queries import PinnedPaginator, pack_pks, unpack_pks
+from django_tableaux.table import build_table
+from django_tableaux.views import TableauxView
+from myapp.models import Model1
+
+
+class PinnedView(TableauxView):
+    model = Model1
+    pin_results = True
+
+
+@pytest.fixture
+def objects(db):
+    for x in range(25):
+        Model1.objects.create(name=f"name_{x:02}", description="", decimal=x)
+
+
+@pytest.fixture
+def session():
+    store = SessionStore()
+    store.save()
+    return store
+
+
+def make_request(session, trigger=None, **data):
+    headers = {"HX-Request": "true", "HX-Trigger": trigger, "HX-Current-URL": "http://testserver/"} if trigger else {}
+    request = RequestFactory().get("/", data, headers=headers)
+    request.htmx = HtmxDetails(request)
+    request.session = session
+    request.user = AnonymousUser()
+    return request
+
+
+def render_page(session, number, **data):
+    response = PinnedView.as_view()(make_request(session, f"~page~{number}", **{"~page": number, **data}))
+    response.render()
+    return response.content.decode()
+
+
+def pin(session, **data):
+    # The first, full page render pins the rows
+    view = PinnedView()
+    view.setup(make_request(session, **data))
+    view.query_dict = data
+    view.get_filtered_object_list()
+    return build_table(view)
+
+
+def test_pack_pks():
+    assert list(unpack_pks(pack_pks(Model1.objects.none(), 10))) == []
+
+
+@pytest.mark.django_db
+def test_pack_pks_limit(objects):
+    assert pack_pks(Model1.objects.all(), 24) is None
+    assert len(unpack_pks(pack_pks(Model1.objects.all(), 25))) == 25
+
+
+def test_pages_are_stable_and_looked_up_by_pk(settings, objects, session):
+    settings.DJANGO_TABLEAUX = {}
+    state = {"~order_by": "-decimal", "~per_page": "10"}
+    table = pin(session, **state)
+    assert isinstance(table.paginator, PinnedPaginator)
+    # A row inserted after pinning does not shift the pages
+    Model1.objects.create(name="name_new", description="", decimal=100)
+    with CaptureQueriesContext(connection) as queries:
+        content = render_page(session, "3", **state)
+    assert "name_04" in content and "name_00" in content
+    assert "name_05" not in content and "name_new" not in content
+    assert not any("COUNT(" in query["sql"] for query in queries.captured_queries)
+
+
+def test_sort_change_pins_again(settings, objects, session):
+    settings.DJANGO_TABLEAUX = {}
+    pin(session, **{"~order_by": "-decimal", "~per_page": "10"})
+    content = render_page(session, "1", **{"~order_by": "decimal", "~per_page": "10"})
+    assert "name_00" in content and "name_10" not in content
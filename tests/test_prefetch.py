@@ -0,0 +1,66 @@
+import django_tables2 as tables
+import pytest
+
+from django_tableaux.models import Pagination
+from django_tableaux.table import build_table
+from django_tableaux.utils import save_columns_dict
+from django_tableaux.views import TableauxView
+from myapp.models import Model1
+from tests.conftest import scroll_request
+
+
+class LoadMoreView(TableauxView):
+    model = Model1
+    pagination = Pagination.LOAD
+    per_page = 10
+    prefetch_pages = True
+
+
+def test_prefetched_rows_are_served_from_cache(tableaux_settings, objects, session):
+    response = LoadMoreView.as_view()(scroll_request(session, _prefetch="true"))
+    assert response.status_code == 204
+
+    # The next click is answered from the cache without touching the database
+    Model1.objects.filter(name="name_15").delete()
+    response = LoadMoreView.as_view()(scroll_request(session))
+    assert response.status_code == 200
+    assert "name_15" in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_prefetch_ignored_when_disabled(tableaux_settings, session):
+    Model1.objects.create(name="name_0", description="", decimal=0)
+
+    class View(LoadMoreView):
+        prefetch_pages = False
+
+    assert View.as_view()(scroll_request(session, _prefetch="true")).status_code == 204
+    response = View.as_view()(scroll_request(session))
+    response.render()
+    assert response.status_code == 200
+
+
+class ColumnsTable(tables.Table):
+    class Meta:
+        model = Model1
+        fields = ("name", "description", "decimal")
+        columns = {"name": "fixed", "description": "default"}
+
+
+@pytest.mark.django_db
+def test_prefetch_key_follows_the_shown_columns(tableaux_settings, session):
+    request = scroll_request(session)
+
+    def key():
+        view = LoadMoreView(table_class=ColumnsTable, client_columns=True)
+        view.setup(request)
+        view.query_dict = {}
+        view.get_filtered_object_list()
+        view.table = build_table(view)
+        return view, view._prefetch_cache_key("tableaux_rows.html")
+
+    view, before = key()
+    # The hidden optional column is rendered too, so only the shown columns tell the states apart
+    assert "decimal" in view.table.columns_visible
+    save_columns_dict(request, view.table, view._bp, {"name": True, "description": True, "decimal": True})
+    assert key()[1] != before
@@ -0,0 +1,66 @@
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.cache import SessionStore
+from django.template import engines
+from django.template.response import TemplateResponse
+from django.test import RequestFactory
+from django.utils.functional import SimpleLazyObject
+from django_htmx.middleware import HtmxDetails
+
+from django_tableaux.views import TableauxView
+from myapp.models import Model1
+
+
+class PublicView(TableauxView):
+    model = Model1
+    public_cache_seconds = 300
+
+
+def request_for(trigger=None, **data):
+    headers = {"HX-Request": "true", "HX-Trigger": trigger, "HX-Current-URL": "http://testserver/"} if trigger else {}
+    request = RequestFactory().get("/", data, headers=headers)
+    request.htmx = HtmxDetails(request)
+    request.session = SessionStore()
+
+    def user():
+        raise AssertionError("user loaded")
+
+    request.user = SimpleLazyObject(user)
+    return request
+
+
+def test_fragments_are_publicly_cacheable(settings, db):
+    settings.DJANGO_TABLEAUX = {}
+    request = request_for("~sort~name", **{"~order_by": "name"})
+    response = PublicView.as_view()(request)
+    response.render()
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "public, max-age=300"
+    vary = {v.strip() for v in response.headers["Vary"].split(",")}
+    assert {"HX-Request", "HX-Target", "HX-Trigger", "HX-Current-URL"} <= vary
+    assert not request.session.accessed and not request.session.modified
+
+
+def test_session_dependent_responses_are_not_public(settings, db):
+    settings.DJANGO_TABLEAUX = {}
+    response = PublicView.as_view()(request_for(_export="csv", _subset="selected"))
+    assert "Cache-Control" not in response.headers
+
+
+def test_templates_that_read_the_session_are_not_public(settings, db):
+    settings.DJANGO_TABLEAUX = {}
+
+    class SessionTemplateView(PublicView):
+        def get(self, request, *args, **kwargs):
+            template = engines["django"].from_string("{{ request.session.greeting }}")
+            return TemplateResponse(request, template, {"request": request})
+
+    response = SessionTemplateView.as_view()(request_for("~sort~name"))
+    assert "Cache-Control" not in response.headers
+
+
+def test_off_by_default(settings, db):
+    settings.DJANGO_TABLEAUX = {}
+    request = request_for("~sort~name", **{"~order_by": "name"})
+    request.user = AnonymousUser()
+    response = TableauxView.as_view(model=Model1)(request)
+    assert "Cache-Control" not in response.headers
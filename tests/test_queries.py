@@ -0,0 +1,84 @@
+import pytest
+from django.core.paginator import EmptyPage, Paginator
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.cache import SessionStore
+from django.test import RequestFactory
+from django_tables2 import tables
+
+import django_tableaux.queries as queries
+from django_tableaux.queries import ConcurrentPaginator, can_run_concurrently, run_concurrently
+from django_tableaux.table import build_table
+from django_tableaux.views import TableauxView
+from myapp.models import Model1
+
+
+class Table1(tables.Table):
+    class Meta:
+        model = Model1
+        fields = ("name",)
+
+
+def create_objects(count):
+    for x in range(count):
+        Model1.objects.create(name=f"name_{x}", description="", decimal=x)
+
+
+@pytest.mark.django_db
+def test_sqlite_never_runs_concurrently():
+    assert not can_run_concurrently(Model1.objects.all())
+    assert not can_run_concurrently([1, 2, 3])
+
+
+def test_run_concurrently_returns_results_in_order():
+    assert run_concurrently(lambda: 1, lambda: 2, lambda: 3) == [1, 2, 3]
+    assert run_concurrently(lambda: "only") == ["only"]
+
+
+@pytest.mark.django_db
+def test_fallback_paginates_sequentially(monkeypatch):
+    create_objects(25)
+
+    def worker(*funcs):
+        raise AssertionError("ran concurrently")
+
+    monkeypatch.setattr(queries, "run_concurrently", worker)
+    table = Table1(Model1.objects.order_by("id"))
+    table.paginate(paginator_class=ConcurrentPaginator, per_page=10, page=3)
+    assert table.paginator.count == 25
+    assert [row.record.name for row in table.page.object_list] == [f"name_{x}" for x in range(20, 25)]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_page_and_count(monkeypatch):
+    create_objects(25)
+    monkeypatch.setattr(queries, "can_run_concurrently", lambda qs: True)
+    table = Table1(Model1.objects.order_by("id"))
+    table.paginate(paginator_class=ConcurrentPaginator, per_page=10, page=2)
+    assert table.paginator.count == 25
+    rows = table.page.object_list
+    # The page slice was evaluated in advance, so iterating it does not query again
+    assert rows.data._result_cache is not None
+    assert [row.record.name for row in rows] == [f"name_{x}" for x in range(10, 20)]
+    with pytest.raises(EmptyPage):
+        table.paginator.page(4)
+
+
+class ConcurrentView(TableauxView):
+    model = Model1
+    table_class = Table1
+    per_page = 10
+    concurrent_queries = True
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("query_timeout_ms, paginator_class", [(0, ConcurrentPaginator), (500, Paginator)])
+def test_query_timeout_uses_the_sequential_paginator(settings, query_timeout_ms, paginator_class):
+    settings.DJANGO_TABLEAUX = {}
+    request = RequestFactory().get("/")
+    request.session = SessionStore()
+    request.user = AnonymousUser()
+    view = ConcurrentView(query_timeout_ms=query_timeout_ms)
+    view.setup(request)
+    view.query_dict = {}
+    view.get_filtered_object_list()
+    assert type(build_table(view).paginator) is paginator_class
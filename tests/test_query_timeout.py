@@ -0,0 +1,133 @@
+import django_filters
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.cache import SessionStore
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django_htmx.middleware import HtmxDetails
+
+from django_tableaux.instrumentation import recording
+from django_tableaux.queries import QueryTimeout, query_timeout
+from django_tableaux.views import TableauxView
+from myapp.models import Model1
+
+# Counts to ten million, far longer than the budgets below
+SLOW = "(WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 10000000) SELECT COUNT(*) FROM c) > 0"
+
+
+class NameFilter(django_filters.FilterSet):
+    name = django_filters.ChoiceFilter(choices=[("name_1", "One")])
+
+    class Meta:
+        model = Model1
+        fields = ["name"]
+
+
+class SlowView(TableauxView):
+    model = Model1
+    filterset_class = NameFilter
+    facet_counts = True
+    pin_results = True
+    query_timeout_ms = 50
+
+    def get_queryset(self):
+        return Model1.objects.extra(where=[SLOW])
+
+
+class FastView(SlowView):
+    def get_queryset(self):
+        return Model1.objects.all()
+
+
+@pytest.fixture
+def objects(db):
+    for x in range(5):
+        Model1.objects.create(name=f"name_{x}", description="", decimal=x)
+
+
+def page_request():
+    headers = {"HX-Request": "true", "HX-Trigger": "~page~1", "HX-Current-URL": "http://testserver/"}
+    request = RequestFactory().get("/", {"~page": "1"}, headers=headers)
+    request.htmx = HtmxDetails(request)
+    request.session = SessionStore()
+    request.user = AnonymousUser()
+    return request
+
+
+def test_query_timeout_interrupts_sqlite(objects):
+    with pytest.raises(QueryTimeout) as e:
+        with query_timeout(50):
+            list(Model1.objects.extra(where=[SLOW]))
+    assert "WITH RECURSIVE" in e.value.sql
+    # The handler is removed, so a later query may run past the old deadline
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT " + SLOW.replace("10000000", "500000").replace(" > 0", ""))
+        assert cursor.fetchone() == (500000,)
+
+
+def test_no_budget_is_a_no_op(objects):
+    with query_timeout(0):
+        assert Model1.objects.count() == 5
+
+
+def test_slow_table_shows_an_alert(settings, objects):
+    settings.DJANGO_TABLEAUX = {}
+    with recording() as record:
+        response = SlowView.as_view()(page_request())
+    assert response.status_code == 200
+    assert "narrowing the filters" in response.content.decode()
+    assert response["HX-Retarget"] == "#page_wrapper"
+    assert [event["event"] for event in record["events"]] == ["query_timeout"]
+
+
+def test_full_page_renders_the_view_template_around_the_alert(settings, objects):
+    settings.DJANGO_TABLEAUX = {}
+    request = RequestFactory().get("/")
+    request.htmx = HtmxDetails(request)
+    request.session = SessionStore()
+    request.user = AnonymousUser()
+    # The page wrapper stands in for the full tableaux.html, whose filter toolbar needs widget_tweaks
+    view = SlowView.as_view(template_name="django_tableaux/basic/tableaux_page_wrapper.html")
+    response = view(request)
+    content = response.content.decode()
+    assert response.status_code == 200
+    assert "HX-Retarget" not in response
+    assert content.strip().startswith('<div id="page_wrapper"')
+    assert "narrowing the filters" in content and "name_4" not in content
+
+
+def test_full_page_does_not_run_the_slow_queries_again(settings, objects):
+    settings.DJANGO_TABLEAUX = {}
+    request = RequestFactory().get("/")
+    request.htmx = HtmxDetails(request)
+    request.session = SessionStore()
+    request.user = AnonymousUser()
+    view = SlowView.as_view(template_name="django_tableaux/basic/tableaux_page_wrapper.html")
+    with CaptureQueriesContext(connection) as queries:
+        view(request)
+    assert sum("WITH RECURSIVE" in query["sql"] for query in queries.captured_queries) == 1
+
+
+def test_timed_out_view_skips_facets_and_pins(settings, objects):
+    settings.DJANGO_TABLEAUX = {}
+    request = RequestFactory().get("/", {"name": "name_1"})
+    request.session = SessionStore()
+    request.user = AnonymousUser()
+    view = SlowView()
+    view.setup(request)
+    view.query_dict = {"name": "name_1"}
+    view.query_timeout = QueryTimeout(50)
+    view.get_filtered_object_list()
+    view.add_facet_counts(view.filterset)
+    assert list(view.filterset.form.fields["name"].choices)[1:] == [("name_1", "One")]
+    assert view.get_pinned_pks(None) is None
+    assert cache.get(view.get_state_key("pins", pagination=False)) is None
+
+
+def test_fast_table_renders(settings, objects):
+    settings.DJANGO_TABLEAUX = {}
+    response = FastView.as_view()(page_request())
+    assert response.is_rendered
+    assert "name_4" in response.content.decode()
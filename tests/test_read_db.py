@@ -0,0 +1,57 @@
+import time
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.cache import SessionStore
+from django.test import RequestFactory
+
+from django_tableaux.views import WRITE_TIME_KEY, TableauxView
+from myapp.models import Model1
+
+
+class ReplicaView(TableauxView):
+    model = Model1
+    filterset_fields = ["name"]
+    search_fields = ["name"]
+    read_db_alias = "replica"
+    read_your_writes_seconds = 5
+
+
+def make_view(method="get", **data):
+    request = getattr(RequestFactory(), method)("/", data)
+    request.session = SessionStore()
+    request.user = AnonymousUser()
+    view = ReplicaView()
+    view.setup(request)
+    view.query_dict = data
+    return view
+
+
+@pytest.fixture(autouse=True)
+def tableaux_settings(settings):
+    settings.DJANGO_TABLEAUX = {}
+
+
+def test_reads_use_the_replica():
+    assert make_view(name="a").get_filtered_object_list().db == "replica"
+
+
+def test_writes_stay_on_the_primary():
+    assert make_view("post").get_filtered_object_list().db == "default"
+
+
+def test_read_your_writes():
+    view = make_view()
+    view.record_write()
+    assert view.get_filtered_object_list().db == "default"
+    view.request.session[WRITE_TIME_KEY] = time.time() - 10
+    assert view.get_filtered_object_list().db == "replica"
+
+
+def test_alias_from_settings(settings):
+    settings.DJANGO_TABLEAUX = {"read_db_alias": "reports"}
+    request = RequestFactory().get("/")
+    request.session = SessionStore()
+    view = TableauxView(model=Model1)
+    view.setup(request)
+    assert view.get_filtered_object_list().db == "reports"
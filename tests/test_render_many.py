@@ -0,0 +1,71 @@
+from decimal import Decimal
+
+import django_tables2 as tables
+import pytest
+from django.contrib.humanize.templatetags.humanize import intcomma
+from django.utils import translation
+
+from django_tableaux.columns import CurrencyColumn, batch_renderable, intcomma_many, row_cells
+
+
+class CountingCurrencyColumn(CurrencyColumn):
+    calls = 0
+
+    def render_many(self, values):
+        CountingCurrencyColumn.calls += 1
+        return super().render_many(values)
+
+
+class TickColumn(tables.Column):
+    def render(self, value):
+        return "\u2705" if value else ""
+
+    def render_many(self, values):
+        return ["\u2705" if value else "" for value in values]
+
+
+class BatchTable(tables.Table):
+    amount = CountingCurrencyColumn(prefix="£")
+    paid = TickColumn()
+    name = tables.Column()
+
+
+VALUES = [0, 7, -1234567, 1000, 12.5, -0.25, 1e21, Decimal("1234.50"), Decimal("-9999999.999"), "12345", "n/a", None]
+
+
+@pytest.mark.parametrize("language", ["en", "de", "fr"])
+def test_intcomma_many_matches_intcomma(settings, language):
+    settings.USE_THOUSAND_SEPARATOR = True
+    with translation.override(language):
+        assert intcomma_many(VALUES) == [intcomma(value) for value in VALUES]
+
+
+def test_page_is_formatted_in_one_call():
+    CountingCurrencyColumn.calls = 0
+    data = [{"amount": 1000 * x, "paid": x % 2, "name": str(x)} for x in range(5)]
+    data[2]["amount"] = None
+    table = BatchTable(data)
+    rows = [{column.name: cell for column, cell in row_cells(row)} for row in table.rows]
+    assert CountingCurrencyColumn.calls == 1
+    # The same cells as rendering one at a time
+    assert rows == [{name: row.get_cell(name) for name in ("amount", "paid", "name")} for row in table.rows]
+    assert rows[1] == {"amount": "£1,000", "paid": "✅", "name": "1"}
+    assert rows[2]["amount"] == "—"
+
+
+def test_overridden_render_is_not_batched():
+    class PlainCurrencyColumn(CurrencyColumn):
+        def render(self, value):
+            return value
+
+    class Table(tables.Table):
+        amount = PlainCurrencyColumn()
+        paid = TickColumn()
+
+        def render_paid(self, value):
+            return "yes"
+
+    table = Table([])
+    assert not batch_renderable(table.columns["amount"])
+    assert not batch_renderable(table.columns["paid"])
+    assert batch_renderable(BatchTable([]).columns["amount"])
@@ -0,0 +1,80 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.urls import path
+
+from django_tableaux.models import Pagination
+from django_tableaux.views import TableauxView
+from myapp.models import Model1
+
+
+class LoadMoreView(TableauxView):
+    model = Model1
+    pagination = Pagination.LOAD
+    per_page = 10
+
+
+urlpatterns = [path("model1/", LoadMoreView.as_view(), name="model1")]
+
+ROWS_HEADERS = {"HX-Request": "true", "HX-Trigger": "_tr_last", "HX-Current-URL": "http://testserver/model1/"}
+
+
+@pytest.fixture
+def recorder(settings, tmp_path):
+    record_file = tmp_path / "tableaux.jsonl"
+    settings.DJANGO_TABLEAUX = {"record_file": str(record_file)}
+    settings.MIDDLEWARE = settings.MIDDLEWARE + ["django_tableaux.middleware.TableauxRecorderMiddleware"]
+    return record_file
+
+
+@pytest.mark.urls(__name__)
+@pytest.mark.django_db
+def test_middleware_records_tableaux_requests(client, recorder):
+    Model1.objects.create(name="name_0", description="", decimal=0)
+    response = client.get("/model1/", {"~page": "1", "_scroll": "true", "~order_by": "name"}, headers=ROWS_HEADERS)
+    assert response.status_code == 200
+    client.get("/elsewhere/")
+    samples = [json.loads(line) for line in recorder.read_text().splitlines()]
+    assert len(samples) == 1
+    sample = samples[0]
+    assert sample["path"] == "/model1/"
+    assert sample["trigger"] == "_tr_last"
+    assert sample["state"] == {"~order_by": ["name"], "~page": ["1"]}
+    assert {"filter", "table", "context", "view", "render"} <= set(sample["stages"])
+
+
+@pytest.mark.urls(__name__)
+@pytest.mark.django_db
+def test_replay(client, recorder):
+    Model1.objects.create(name="name_0", description="", decimal=0)
+    client.get("/model1/", {"~page": "1", "_scroll": "true"}, headers=ROWS_HEADERS)
+    out = StringIO()
+    call_command("tableaux_replay", str(recorder), "--repeat", "2", "--lines", "5", stdout=out)
+    output = out.getvalue()
+    assert output.count("200 /model1/ _tr_last") == 2
+    assert "filter=" in output and "render=" in output
+    assert "function calls" in output
+    assert "Replayed 2 requests" in output
+
+
+@pytest.mark.urls(__name__)
+@pytest.mark.django_db
+def test_post_requests_are_not_recorded(client, recorder):
+    client.post("/model1/", {"delete": "", "selected_ids": "1"}, headers=ROWS_HEADERS)
+    assert not recorder.exists() or recorder.read_text() == ""
+
+
+@pytest.mark.urls(__name__)
+@pytest.mark.django_db
+def test_replay_skips_post_samples(client, recorder):
+    Model1.objects.create(name="name_0", description="", decimal=0)
+    client.get("/model1/", {"~page": "1", "_scroll": "true"}, headers=ROWS_HEADERS)
+    sample = json.loads(recorder.read_text())
+    assert sample["method"] == "GET"
+    with open(recorder, "a") as file:
+        file.write(json.dumps({**sample, "method": "POST", "params": {"delete": [""]}}) + "\n")
+    out = StringIO()
+    call_command("tableaux_replay", str(recorder), "--profiler", "none", stdout=out)
+    assert "Replayed 1 requests" in out.getvalue()
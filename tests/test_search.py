@@ -0,0 +1,73 @@
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.cache import SessionStore
+from django.core.management import call_command
+from django.test import RequestFactory
+from django.urls import path
+from django_htmx.middleware import HtmxDetails
+
+from django_tableaux.search import NaiveSearch, SQLiteSearch, get_search_backend
+from django_tableaux.views import TableauxView
+from myapp.models import Model1
+
+
+class SearchView(TableauxView):
+    model = Model1
+    search_fields = ["name", "description"]
+
+
+urlpatterns = [path("search/", SearchView.as_view(), name="search")]
+
+
+@pytest.fixture
+def records(db):
+    Model1.objects.create(name="Alpha", description="first letter", decimal=1)
+    Model1.objects.create(name="Beta", description="second letter", decimal=2)
+    Model1.objects.create(name="Gamma", description="third", decimal=3)
+
+
+def names(queryset):
+    return sorted(queryset.values_list("name", flat=True))
+
+
+@pytest.mark.parametrize("backend", [NaiveSearch, SQLiteSearch])
+def test_backends_match_every_term_as_prefix(records, backend):
+    fields = SearchView.search_fields
+    backend().build_index(Model1, fields)
+    queryset = Model1.objects.all()
+    assert names(backend().search(queryset, fields, "lett")) == ["Alpha", "Beta"]
+    assert names(backend().search(queryset, fields, "beta lett")) == ["Beta"]
+    assert names(backend().search(queryset, fields, "gam")) == ["Gamma"]
+
+
+@pytest.mark.urls(__name__)
+def test_sqlite_index_follows_changes(records):
+    out = StringIO()
+    call_command("tableaux_search_index", stdout=out)
+    assert "search: created tbx_search_myapp_model1_" in out.getvalue()
+    backend = get_search_backend(None, Model1, SearchView.search_fields)
+    assert isinstance(backend, SQLiteSearch)
+    Model1.objects.filter(name="Gamma").update(description="another letter")
+    Model1.objects.filter(name="Alpha").delete()
+    assert names(backend.search(Model1.objects.all(), SearchView.search_fields, "letter")) == ["Beta", "Gamma"]
+    call_command("tableaux_search_index", "--drop", stdout=out)
+    assert isinstance(get_search_backend(None, Model1, SearchView.search_fields), NaiveSearch)
+
+
+def test_search_resets_page_and_filters_rows(settings, records):
+    settings.DJANGO_TABLEAUX = {}
+    request = RequestFactory().get(
+        "/",
+        {"~search": "letter", "~page": "3", "~order_by": "name"},
+        headers={"HX-Request": "true", "HX-Trigger": "~search~", "HX-Current-URL": "http://testserver/"},
+    )
+    request.htmx = HtmxDetails(request)
+    request.session = SessionStore()
+    request.user = AnonymousUser()
+    response = SearchView.as_view()(request)
+    response.render()
+    content = response.content.decode()
+    assert "Alpha" in content and "Beta" in content and "Gamma" not in content
+    assert '<input type="hidden" name="~page" value="1">' in content
@@ -0,0 +1,37 @@
+from django_tableaux.utils import load_columns_dict, set_column
+from django_tableaux.views import TableauxView
+from myapp.models import Model1
+from tests.conftest import htmx_request
+
+
+class SessionView(TableauxView):
+    model = Model1
+
+
+def render_page(session, **data):
+    request = htmx_request("~page~1", session, **data)
+    response = SessionView.as_view()(request)
+    response.render()
+    return request, response.context_data["table"]
+
+
+def test_rendering_does_not_modify_the_session(tableaux_settings, db, session):
+    render_page(session, bp="md")
+    session.modified = False
+    render_page(session, bp="md", **{"~page": "2"})
+    assert not session.modified
+    # A change of breakpoint is recorded
+    render_page(session, bp="lg")
+    assert session.modified
+
+
+def test_columns_are_saved_only_when_changed(tableaux_settings, db, session):
+    request, table = render_page(session)
+    session.modified = False
+    columns = load_columns_dict(request, table, "md")
+    assert not session.modified
+    set_column(request, table, "md", "name", not columns["name"])
+    assert session.modified
+    session.modified = False
+    assert load_columns_dict(request, table, "md")["name"] is not columns["name"]
+    assert not session.modified
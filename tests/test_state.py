@@ -0,0 +1,77 @@
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.cache import SessionStore
+from django.test import RequestFactory
+
+from django_tableaux.views import TableauxView
+from myapp.models import Model1
+
+
+class StateView(TableauxView):
+    model = Model1
+    filterset_fields = ["name", "description"]
+
+    def get_initial_data(self):
+        return {"description": "open"}
+
+
+def make_view(query_dict):
+    request = RequestFactory().get("/")
+    request.session = SessionStore()
+    request.session.save()
+    request.user = AnonymousUser()
+    view = StateView()
+    view.setup(request)
+    view.get_filterset()
+    view.query_dict = query_dict
+    view._bp = "md"
+    return view
+
+
+@pytest.fixture(autouse=True)
+def tableaux_settings(settings):
+    settings.DJANGO_TABLEAUX = {}
+
+
+def test_defaults_and_empty_values_are_left_out():
+    view = make_view({"~page": "1", "~per_page": "20", "~order_by": "", "name": "", "description": "open", "x": "1"})
+    assert view.get_state() == {}
+    assert view.get_state_key(scoped=False) == make_view({}).get_state_key(scoped=False)
+
+
+def test_clearing_a_filter_with_initial_data_is_kept():
+    assert make_view({"description": ""}).get_state() == {"description": ""}
+
+
+def test_state_is_canonical():
+    first = make_view({"name": ["b", "a"], "~order_by": "-name", "~search": " bolt "})
+    second = make_view({"~search": "bolt", "~order_by": "-name", "name": ["a", "b"]})
+    assert first.get_state() == second.get_state() == {"name": ["a", "b"], "~order_by": "-name", "~search": "bolt"}
+    assert first.get_state_key(scoped=False) == second.get_state_key(scoped=False)
+
+
+def test_optional_parts():
+    view = make_view({"name": "a", "~page": "3", "~order_by": "name"})
+    assert view.get_state() == {"name": "a", "~order_by": "name", "~page": "3"}
+    assert view.get_state(pagination=False, ordering=False) == {"name": "a"}
+    assert view.get_state_key("facets", pagination=False) != view.get_state_key("facets")
+    assert view.get_state_key("facets") != view.get_state_key("footer")
+
+
+@pytest.mark.django_db
+def test_columns():
+    state = make_view({}).get_state(columns=True)
+    assert state["~bp"] == "md"
+    assert "name" in state["~columns"]
+
+
+def test_key_is_scoped():
+    view = make_view({})
+    view.request.session = SessionStore()
+    assert view.get_state_key() is None
+    assert view.get_state_key(scoped=False).startswith("tbx:state:")
+
+
+def test_query_string():
+    view = make_view({"~page": "1", "~order_by": "name", "name": "", "other": "x"})
+    assert view.make_query_string() == "~order_by=name&other=x"
@@ -0,0 +1,88 @@
+import json
+import re
+
+import pytest
+
+from django_tableaux.models import Pagination
+from django_tableaux.views import TableauxView
+from myapp.models import Model1
+from tests.conftest import htmx_request, render, scroll_request
+
+
+class LoadMoreView(TableauxView):
+    model = Model1
+    pagination = Pagination.LOAD
+    per_page = 10
+    group_columns = ["description"]
+
+
+def seq_request(session, seq, trigger, **data):
+    return htmx_request(trigger, session, {"X-Tableaux-Seq": seq}, **data)
+
+
+def page_request(session, seq):
+    return seq_request(session, seq, "~page~1", **{"~page": "1"})
+
+
+def rows_request(session, seq):
+    return scroll_request(session, {"X-Tableaux-Seq": seq})
+
+
+@pytest.mark.django_db
+def test_superseded_request_is_dropped(tableaux_settings, session):
+    Model1.objects.create(name="name_0", description="", decimal=0)
+    old = LoadMoreView()
+    old.setup(page_request(session, "page1-1"))
+    old.query_dict = {}
+    old.register_request_seq()
+    # A newer request for the same table arrives before the old one renders
+    assert LoadMoreView.as_view()(page_request(session, "page1-2")).status_code == 200
+    assert old.is_superseded()
+    assert old.render_template().status_code == 204
+
+
+@pytest.mark.django_db
+def test_other_pages_do_not_supersede(tableaux_settings, session):
+    assert LoadMoreView.as_view()(page_request(session, "page1-5")).status_code == 200
+    # A reload starts numbering again under a new page id
+    assert LoadMoreView.as_view()(page_request(session, "page2-1")).status_code == 200
+    assert LoadMoreView.as_view()(page_request(session, "page1-4")).status_code == 204
+
+
+@pytest.mark.django_db
+def test_requests_that_add_rows_are_not_dropped(tableaux_settings, session):
+    Model1.objects.create(name="name_0", description="odd", decimal=0)
+    assert LoadMoreView.as_view()(rows_request(session, "page1-5")).status_code == 200
+    assert LoadMoreView.as_view()(rows_request(session, "page1-4")).status_code == 200
+
+
+@pytest.mark.django_db
+def test_group_expand_survives_a_later_sort(tableaux_settings, session):
+    Model1.objects.create(name="name_0", description="odd", decimal=0)
+    expand = LoadMoreView()
+    expand.setup(seq_request(session, "page1-1", "~grp~1", **{"~group": "description", "_group": json.dumps("odd")}))
+    expand.query_dict = {}
+    expand.register_request_seq()
+    sort = seq_request(session, "page1-2", "~sort~name", **{"~group": "description"})
+    assert LoadMoreView.as_view()(sort).status_code == 200
+    assert not expand.is_superseded()
+    # A sort does not supersede a page change either
+    assert LoadMoreView.as_view()(page_request(session, "page1-1")).status_code == 200
+
+
+@pytest.mark.django_db
+def test_only_replacing_triggers_join_the_sync_queue(tableaux_settings, session):
+    for x in range(25):
+        Model1.objects.create(name=f"name_{x}", description=f"group_{x % 2}", decimal=x)
+    sync = 'hx-sync="#tableaux:replace"'
+
+    class PagedView(LoadMoreView):
+        pagination = Pagination.PAGED
+
+    content = render(PagedView, seq_request(session, "page1-1", "~sort~name", **{"~order_by": "name"}))
+    assert re.search(r'<th[^>]*id="~sort~name"[^>]*>', content).group().count(sync) == 1
+    content = render(PagedView, page_request(session, "page1-2"))
+    assert re.search(r'<span[^>]*id="~page~2"[^>]*>', content).group().count(sync) == 1
+    content = render(LoadMoreView, seq_request(session, "page1-3", "~page~1", **{"~group": "description"}))
+    headers = re.findall(r'<tr class="tbx-group-header"[^>]*>', content)
+    assert len(headers) == 2 and not any(sync in header for header in headers)
@@ -0,0 +1,89 @@
+import django_tables2 as tables
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.template import engines
+from django.test import RequestFactory
+from django_htmx.middleware import HtmxDetails
+
+from django_tableaux.buttons import Button
+from django_tableaux.table import build_table
+from django_tableaux.utils import save_columns_dict
+from django_tableaux.views import TableauxView
+from myapp.models import Model1
+
+
+class ColumnsTable(tables.Table):
+    class Meta:
+        model = Model1
+        fields = ("name", "description", "decimal")
+        columns = {"name": "fixed", "description": "default"}
+
+
+class ToolbarView(TableauxView):
+    model = Model1
+    table_class = ColumnsTable
+    per_page = 10
+    toolbar = {"left": "columns", "right": "buttons"}
+    columns_control = True
+    toolbar_cache_seconds = 60
+    label = "One"
+
+    def get_buttons(self):
+        return [Button(self.label)]
+
+
+def make_view(session, query=None, **initkwargs):
+    request = RequestFactory().get("/", query or {})
+    request.htmx = HtmxDetails(request)
+    request.session = session
+    request.user = AnonymousUser()
+    view = ToolbarView(**initkwargs)
+    view.setup(request)
+    view.query_dict = dict(query or {})
+    view.get_filtered_object_list()
+    view.table = build_table(view)
+    return view
+
+
+def render(view):
+    template = engines["django"].from_string("{% load django_tableaux %}{% toolbar_main %}")
+    return template.render(view.get_context_data(), view.request)
+
+
+def test_toolbar_is_cached_per_state(tableaux_settings, objects, session):
+    assert ">One</button>" in render(make_view(session))
+    # The same state is served from the cache
+    assert ">One</button>" in render(make_view(session, label="Two"))
+    # Another sort order is another state
+    assert ">Two</button>" in render(make_view(session, {"~order_by": "name"}, label="Two"))
+
+
+def test_toolbar_is_not_cached_by_default(tableaux_settings, objects, session):
+    render(make_view(session, toolbar_cache_seconds=0))
+    assert ">Two</button>" in render(make_view(session, label="Two", toolbar_cache_seconds=0))
+
+
+@pytest.mark.parametrize(
+    "initkwargs",
+    [
+        {"toolbar": {"left": "record_count", "right": "buttons"}},
+        {"toolbar": {"left": "paginator", "right": "buttons"}},
+        {"toolbar": {"left": "actions", "right": "buttons"}, "get_bulk_actions": lambda: [("delete", "Delete")]},
+    ],
+)
+def test_toolbar_with_session_or_data_dependent_items_is_not_cached(tableaux_settings, objects, session, initkwargs):
+    assert make_view(session, **initkwargs).get_toolbar_cache_key() is None
+
+
+def test_client_column_changes_change_the_key(tableaux_settings, objects, session):
+    view = make_view(session, client_columns=True)
+    # The hidden optional column is rendered, but it is not one of the shown columns
+    assert "decimal" in view.table.columns_visible
+    assert view.get_state(columns=True)["~columns"] == ["name", "description"]
+    before = view.get_toolbar_cache_key()
+    save_columns_dict(view.request, view.table, view._bp, {"name": True, "description": True, "decimal": True})
+    assert make_view(session, client_columns=True).get_toolbar_cache_key() != before
+
+
+def test_button_html_is_reused(tableaux_settings):
+    assert Button("Save", hx_post="/save").render() is Button("Save", hx_post="/save").render()
@@ -0,0 +1,47 @@
+import pytest
+from django_tables2.paginators import LazyPaginator
+
+from django_tableaux.models import Pagination
+from django_tableaux.table import build_table
+from django_tableaux.views import TableauxView
+from myapp.models import Model1
+from tests.conftest import htmx_request, render
+
+
+class WindowView(TableauxView):
+    model = Model1
+    pagination = Pagination.INFINITE
+    per_page = 10
+    window_rows = 30
+
+
+def range_request(value):
+    return htmx_request("_range_top", _range=value)
+
+
+def test_range_request_renders_requested_rows(tableaux_settings, objects):
+    content = render(WindowView, range_request("5-10"))
+    assert [f'data-index="{x}"' in content for x in range(4, 11)] == [False] + [True] * 5 + [False]
+    # A range carries no spacers or infinite scroll sentinel of its own
+    assert "tbx-spacer" not in content
+    assert "_scroll" not in content
+
+
+@pytest.mark.django_db
+def test_range_request_is_bounded(tableaux_settings):
+    with pytest.raises(ValueError):
+        WindowView.as_view()(range_request("0-100"))
+
+
+def test_lazy_paginator_pages_have_an_offset(tableaux_settings, objects):
+    class LazyView(TableauxView):
+        model = Model1
+        paginator_class = LazyPaginator
+        per_page = 10
+
+    view = LazyView()
+    view.setup(range_request(""))
+    view.query_dict = {"~page": "2"}
+    view.get_filtered_object_list()
+    # LazyPaginator has no count, so Page.start_index() would raise NotImplementedError
+    assert build_table(view).row_offset == 10